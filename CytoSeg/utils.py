@@ -9,8 +9,13 @@
 
 #%%############################################################################# imports
 
+import hashlib
+import heapq
+import io
 import itertools
 import matplotlib.pyplot as plt
+import mmap
+import multiprocessing
 import networkx as nx
 import numpy as np
 import os
@@ -20,6 +25,9 @@ import scipy as sp
 import scipy.misc
 import scipy.ndimage
 import scipy.optimize
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
 import scipy.spatial
 import scipy.stats
 import scipy.cluster
@@ -28,70 +36,238 @@ import skimage.filters
 import skimage.morphology
 import skimage.feature
 import skimage.segmentation
+try:
+    import tifffile
+except ImportError:
+    import skimage.external.tifffile as tifffile
 import shapely
 import shapely.geometry
+import shutil
 import sys
+import tempfile
 import xml
-import xml.dom
-import xml.dom.minidom   
+import xml.etree
+import xml.etree.ElementTree
+import zipfile
     
 import utils    
     
 #%%############################################################################# help functions
             
-def xmlread(name,threed=0):
+def xmlread(name,threed=0,table=0,cache=1):
     """Read Fiji-Trackmate xml file to Python list of lists.
 
     Parameters
     ----------
     name : name and directory of xml file
     threed : set to 1 for three-dimensional data
+    table : return list of tracks (=0) or one flat table of all tracks (=1)
+    cache : load tracks from binary file next to xml file, which is rebuilt when the xml file changes (=1), or always parse xml file (=0)
     
     Returns
     -------
-    T : list of tracks
-
-    """
-    xmldoc=xml.dom.minidom.parse(name)
-    spots=xmldoc.getElementsByTagName('Spot')
-    tracs=xmldoc.getElementsByTagName('Track')    
-    S=[]
-    N=[]
-    for spot in spots:
-        n=int(spot.attributes['ID'].value)
-        t=float(spot.attributes['POSITION_T'].value)
-        x=float(spot.attributes['POSITION_X'].value)
-        y=float(spot.attributes['POSITION_Y'].value)
-        if(threed): z=float(spot.attributes['POSITION_Z'].value)
-        else: z=0
-        mi=float(spot.attributes['MEAN_INTENSITY'].value)
-        mt=float(spot.attributes['TOTAL_INTENSITY'].value)
-        mq=float(spot.attributes['QUALITY'].value)
-        md=float(spot.attributes['ESTIMATED_DIAMETER'].value)
-        N.append(n)
-        S.append([n,t,x,y,z,mi,mt,mq,md])   
-    T=[]
-    for trac in tracs:
-        n=int(trac.attributes['TRACK_ID'].value)
-        dur=int(float(trac.attributes['TRACK_DURATION'].value))
-        dis=float(trac.attributes['TRACK_DISPLACEMENT'].value)
-        edges=trac.getElementsByTagName('Edge')
-        E=[]
-        for edge in edges:
-            id0=int(edge.attributes['SPOT_SOURCE_ID'].value)
-            id1=float(edge.attributes['SPOT_TARGET_ID'].value)
-            vel=float(edge.attributes['VELOCITY'].value)
-            n0=N.index(id0)
-            n1=N.index(id1)
-            m0,t0,x0,y0,z0,mi0,mt0,mq0,md0=S[n0]
-            m1,t1,x1,y1,z1,mi1,mt1,mq1,md1=S[n1]
-            E.append([t0,x0,y0,z0,mi0,mt0,mq0,md0,t1,x1,y1,z1,mi1,mt1,mq1,md1])
-        E=np.array(E)        
-        if(len(E)>0):  
-            E=E[E[:,0].argsort()]        
-        T.append(E)
+    T : list of tracks, i.e., arrays of edges sorted by time with 16 properties of source and target spots each, or structured array with track IDs and the same properties as columns
+
+    """
+    if(cache):                                                                  # load cached tracks if xml file is unchanged
+        tab,lens=utils.track_load(name,threed)
+        if(tab is not None):
+            return tab if table else utils.table_tracks(tab,lens)
+    keys=['POSITION_T','POSITION_X','POSITION_Y','POSITION_Z','MEAN_INTENSITY','TOTAL_INTENSITY','QUALITY','ESTIMATED_DIAMETER']
+    S=[]                                                                        # list of spot properties
+    N={}                                                                        # dictionary of spot IDs
+    ids,E,T=[],[],[]
+    stack=[]                                                                    # open elements from root to current element
+    for event,elem in xml.etree.ElementTree.iterparse(name,events=('start','end')): # stream through xml file
+        if(event=='start'):
+            stack.append(elem)
+            continue
+        stack.pop()
+        if(elem.tag=='Spot'):                                                   # for each spot...
+            N[int(elem.attrib['ID'])]=len(S)
+            S.append([float(elem.attrib[k]) if(threed or k!='POSITION_Z') else 0.0 for k in keys])
+        elif(elem.tag=='Edge'):                                                 # for each edge...
+            E.append([int(elem.attrib['SPOT_SOURCE_ID']),int(float(elem.attrib['SPOT_TARGET_ID']))])
+        elif(elem.tag=='Track'):                                                # for each track...
+            ids.append(int(elem.attrib['TRACK_ID']))
+            T.append(E)
+            E=[]
+        if(len(stack)>0):                                                       # detach every parsed element from its parent so that memory does not grow with file size
+            stack[-1].remove(elem)
+    S=np.array(S).reshape(-1,len(keys))
+    for i,E in enumerate(T):                                                    # look up source and target spots of edges
+        if(len(E)>0):
+            E=np.array([[N[n0],N[n1]] for n0,n1 in E])
+            E=np.hstack([S[E[:,0]],S[E[:,1]]])
+            E=E[E[:,0].argsort()]                                               # sort edges by time
+        else:
+            E=np.array(E)
+        T[i]=E
+    if(table or cache):                                                         # convert to one table with track IDs
+        tab=utils.track_table(T,ids)
+        if(cache):
+            utils.track_save(name,threed,tab,[len(E) for E in T])
+        if(table):
+            return tab
     return T    
 
+def track_table(T,ids):
+    """Convert list of tracks to one flat table.
+
+    Parameters
+    ----------
+    T : list of tracks (see xmlread)
+    ids : track IDs
+    
+    Returns
+    -------
+    tab : structured array with track IDs and properties of source and target spots as columns
+
+    """
+    names=[k+j for j in ['0','1'] for k in ['t','x','y','z','mi','mt','mq','md']]
+    L=[len(E) for E in T]
+    tab=np.zeros(sum(L),dtype=[('track','int64')]+[(k,'float64') for k in names])
+    tab['track']=np.repeat(np.array(ids,dtype='int64'),L)
+    if(sum(L)>0):
+        X=np.vstack([E for E in T if len(E)>0])
+        for i,k in enumerate(names):
+            tab[k]=X[:,i]
+    return tab
+
+def table_tracks(tab,lens):
+    """Convert flat table to list of tracks.
+
+    Parameters
+    ----------
+    tab : structured array of tracks (see track_table)
+    lens : number of edges of each track
+    
+    Returns
+    -------
+    T : list of tracks (see xmlread)
+
+    """
+    X=np.column_stack([tab[k] for k in tab.dtype.names[1:]]).reshape(-1,16)
+    T=np.split(X,np.cumsum(lens)[:-1]) if len(lens)>0 else []
+    T=[E if len(E)>0 else np.array([]) for E in T]
+    return T
+
+def track_key(name,threed):
+    """Compute key of xml file for cached tracks.
+
+    Parameters
+    ----------
+    name : name and directory of xml file
+    threed : set to 1 for three-dimensional data
+    
+    Returns
+    -------
+    key : file size, modification time, and dimensionality
+    
+    """
+    stat=os.stat(name)
+    key=np.array([stat.st_size,stat.st_mtime,threed],dtype='float64')
+    return key
+
+def track_hash(name):
+    """Compute SHA-1 hash of xml file.
+
+    Parameters
+    ----------
+    name : name and directory of xml file
+    
+    Returns
+    -------
+    digest : hexadecimal hash
+    
+    """
+    sha=hashlib.sha1()
+    with open(name,'rb') as f:
+        for block in iter(lambda: f.read(2**20),b''):                           # read file in blocks of 1MB
+            sha.update(block)
+    return sha.hexdigest()
+
+def track_load(name,threed):
+    """Load cached tracks of xml file.
+
+    Parameters
+    ----------
+    name : name and directory of xml file
+    threed : set to 1 for three-dimensional data
+    
+    Returns
+    -------
+    tab : structured array of tracks (see track_table), None if cache is missing or outdated
+    lens : number of edges of each track
+    
+    """
+    try:
+        with np.load(name+'.npz') as data:
+            key,digest,tab,lens=data['key'],str(data['hash']),data['tab'],data['lens']
+    except (IOError,OSError,KeyError,ValueError,EOFError,zipfile.BadZipfile):   # cache is missing, truncated, or broken
+        return None,None
+    new=utils.track_key(name,threed)
+    if(key[0]!=new[0] or key[2]!=new[2]):                                       # file size or dimensionality changed
+        return None,None
+    if(key[1]!=new[1]):                                                         # file was modified...
+        if(digest!=utils.track_hash(name)):                                     # and its content changed
+            return None,None
+        utils.track_save(name,threed,tab,lens,digest)                           # or only its modification time, which is updated in cache
+    return tab,lens
+
+def track_save(name,threed,tab,lens,digest=None):
+    """Save tracks of xml file to cache next to it.
+
+    Parameters
+    ----------
+    name : name and directory of xml file
+    threed : set to 1 for three-dimensional data
+    tab : structured array of tracks (see track_table)
+    lens : number of edges of each track
+    digest : hash of xml file (None = compute hash)
+    
+    Returns
+    -------
+    None
+    
+    """
+    key=utils.track_key(name,threed)
+    if(digest is None):
+        digest=utils.track_hash(name)
+    try:
+        fd,temp=tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(name)),suffix='.tmp')
+    except (IOError,OSError):                                                   # skip cache if directory is not writable
+        return None
+    try:
+        with os.fdopen(fd,'wb') as f:                                           # write cache to temporary file next to xml file
+            np.savez(f,key=key,hash=np.array(digest),tab=tab,lens=np.array(lens,dtype='int64'))
+        utils.file_replace(temp,name+'.npz')                                    # replace cache at once so that readers never see partial files
+    except (IOError,OSError):
+        if(os.path.exists(temp)):
+            os.remove(temp)
+    return None
+
+def file_replace(temp,name):
+    """Move file to destination and replace existing file.
+
+    Parameters
+    ----------
+    temp : name and directory of file to move
+    name : name and directory of destination
+    
+    Returns
+    -------
+    None
+    
+    """
+    if(hasattr(os,'replace')):                                                  # replace file atomically on Python 3
+        os.replace(temp,name)
+    else:                                                                       # rename replaces files atomically on Python 2 except on Windows
+        if(os.name=='nt' and os.path.exists(name)):
+            os.remove(name)
+        os.rename(temp,name)
+    return None
+
 def angle360(dxy):
     """Compute angle of two-dimensional vector relative to y-axis in degrees.
 
@@ -160,50 +336,257 @@ def tube_filter(imO,sigma):
     imR=-1.0*imM[1]
     imT=255.0*(imR-imR.min())/(imR.max()-imR.min())
     return imT
+
+def gradient_stack(im,axis,out):
+    """Compute gradient of array along axis using central differences in the interior and one-sided differences at the borders.
+
+    Parameters
+    ----------
+    im : array
+    axis : axis along which gradient is computed
+    out : preallocated output array of same shape as im
+    
+    Returns
+    -------
+    out : gradient of array
+
+    """
+    im=np.moveaxis(im,axis,0)                                                   # move axis to front
+    ot=np.moveaxis(out,axis,0)
+    np.subtract(im[2:],im[:-2],out=ot[1:-1])                                    # compute central differences
+    ot[1:-1]*=0.5
+    np.subtract(im[1],im[0],out=ot[0])                                          # compute one-sided differences at the borders
+    np.subtract(im[-1],im[-2],out=ot[-1])
+    return out
+
+def tube_filter_stack(imO,sigma,out=None,dtype='float64'):
+    """Apply tubeness filter to all two-dimensional slices of image stack.
+
+    Parameters
+    ----------
+    imO : original image stack with slices along first two axes, e.g., (y,x,z) or (y,x,z,t)
+    sigma : width parameter of tube-like structures
+    out : preallocated output array (optional)
+    dtype : precision of filter computations ('float64' or 'float32')
+    
+    Returns
+    -------
+    imT : filtered and rescaled image stack (each slice is rescaled separately)
+
+    """
+    shape=imO.shape
+    if(out is None):
+        out=np.empty(shape,dtype=dtype)
+    imB=np.empty((3,)+shape,dtype=dtype)                                        # allocate buffers for Gaussian filter, gradients, and Hessian
+    imF,imD,imH=imB
+    sigmas=(sigma,sigma)+(0,)*(len(shape)-2)                                    # do not filter across slices 
+    sp.ndimage.gaussian_filter(imO.astype(dtype,copy=False),sigmas,output=imF,mode='reflect') # apply Gaussian filter
+    gradient_stack(imF,0,imD)                                                   # compute first derivative along y
+    gradient_stack(imD,0,out)                                                   # compute Hessian components Hyy and Hyx
+    gradient_stack(imD,1,imH)
+    gradient_stack(imF,1,imD)                                                   # compute first derivative along x
+    gradient_stack(imD,1,imF)                                                   # compute Hessian component Hxx
+    np.subtract(out,imF,out=imD)                                                # compute smaller eigenvalue of Hessian (M00+M11)/2-sqrt(4*M01**2+(M00-M11)**2)/2
+    imD**=2
+    imH**=2
+    imH*=4
+    imD+=imH
+    np.sqrt(imD,out=imD)
+    out+=imF
+    out-=imD
+    out*=-0.5                                                                   # invert sign of eigenvalue
+    omin=out.min(axis=(0,1),keepdims=True)                                      # rescale each slice separately
+    omax=out.max(axis=(0,1),keepdims=True)
+    out-=omin
+    out*=255.0
+    out/=(omax-omin)
+    return out
+
+def threshold_stack(imR,block,out=None):
+    """Apply adaptive Gaussian threshold to all two-dimensional slices of image stack.
+
+    Parameters
+    ----------
+    imR : image stack with slices along first two axes
+    block : block size of adaptive filter
+    out : preallocated output array (optional)
+    
+    Returns
+    -------
+    imT : binary image stack
+
+    """
+    sigma=(block-1.0)/6.0                                                       # width of Gaussian filter corresponding to block size
+    sigmas=(sigma,sigma)+(0,)*(imR.ndim-2)                                      # do not filter across slices 
+    imF=sp.ndimage.gaussian_filter(imR,sigmas,mode='reflect')                   # compute local threshold
+    imT=np.greater(imR,imF,out=out)
+    return imT
     
-def cell_sample(mask,R):  
+def cell_sample(mask,R,rng=None):  
     """Sample random points uniformly across masked area.
 
     Parameters
     ----------
     mask : sampling area
     R : number of sampling points
+    rng : random number generator (numpy RandomState; None = global random state)
     
     Returns
     -------
     coords : sampled random points
 
     """
+    if(rng is None):
+        rng=np.random
     wh=np.array(np.where(mask)).T       
     W=len(wh)
-    idx=sp.random.randint(0,W,R)     
-    coords=wh[idx]+sp.rand(R,2) 
+    idx=rng.randint(0,W,R)     
+    coords=wh[idx]+rng.rand(R,2) 
     return coords
-     
+
+def null_seed(seed,frame,replicate):
+    """Create random number generator of randomized network.
+
+    Parameters
+    ----------
+    seed : base seed of analysis
+    frame : frame index
+    replicate : index of randomized network
+    
+    Returns
+    -------
+    rng : random number generator (numpy RandomState) that only depends on seed, frame, and replicate
+
+    """
+    rng=np.random.RandomState([seed,frame,replicate])                           # seed independent stream from base seed, frame, and replicate
+    return rng
+
+def pair_index(poz,bins,B):
+    """Index pairs of node positions by distance bin.
+
+    Parameters
+    ----------
+    poz : node positions
+    bins : bin boundaries of pair distances
+    B : number of lowest bins to index
+
+    Returns
+    -------
+    pairs : list of arrays of node pairs (i<j) per bin in raster order
+    dists : list of arrays of pair distances per bin
+
+    """
+    N=len(poz)
+    rmax=bins[B]                                                                # largest distance that needs to be indexed
+    if(rmax<bins[-1]):                                                          # query KD-tree for pairs within largest distance...
+        tree=scipy.spatial.cKDTree(1.0*poz)
+        pr=np.array(list(tree.query_pairs(rmax)),dtype='int').reshape(-1,2)
+        pr=np.sort(pr,axis=1)
+    else:                                                                       # or enumerate all pairs if longest bin is needed
+        pr=np.array(np.triu_indices(N,1)).T
+    pr=pr[np.lexsort((pr[:,1],pr[:,0]))]                                        # sort pairs in raster order
+    dp=np.sqrt(((poz[pr[:,0]]-poz[pr[:,1]])**2).sum(1))                         # compute pair distances
+    bp=np.searchsorted(bins,dp,side='right')-1                                  # assign bin numbers to pairs
+    pairs=[pr[bp==b] for b in range(B)]
+    dists=[dp[bp==b] for b in range(B)]
+    return pairs,dists
+
 def multi_line_intersect(seg,segs):  
     """Check intersections of line segments.
 
     Parameters
     ----------
-    seg : single line segment
-    sigma : multiple line segments
+    seg : single line segment or array of line segments (paired with segs)
+    segs : multiple line segments
     
     Returns
     -------
     intersects : Boolean array indicating intersects
 
     """
-    intersects=np.array([False])
+    intersects=np.zeros(0,dtype='bool')
     if(len(segs)>0): 
-        d3=segs[:,1,:]-segs[:,0,:]
-        d1=seg[1,:]-seg[0,:]
-        c1x=np.cross(d3,seg[0,:]-segs[:,0,:])    
-        c1y=np.cross(d3,seg[1,:]-segs[:,0,:])
-        c3x=np.cross(d1,segs[:,0,:]-seg[0,:])
-        c3y=np.cross(d1,segs[:,1,:]-seg[0,:]) 
-        intersect=np.logical_and(c1x*c1y<0,c3x*c3y<0)    
+        d3=segs[...,1,:]-segs[...,0,:]
+        d1=seg[...,1,:]-seg[...,0,:]
+        c1x=utils.cross_2d(d3,seg[...,0,:]-segs[...,0,:])
+        c1y=utils.cross_2d(d3,seg[...,1,:]-segs[...,0,:])
+        c3x=utils.cross_2d(d1,segs[...,0,:]-seg[...,0,:])
+        c3y=utils.cross_2d(d1,segs[...,1,:]-seg[...,0,:]) 
+        intersects=np.logical_and(c1x*c1y<0,c3x*c3y<0)    
     return intersects
 
+def cross_2d(a,b):
+    """Compute cross products of two-dimensional vectors.
+
+    Parameters
+    ----------
+    a,b : arrays of vectors along last axis
+    
+    Returns
+    -------
+    c : array of cross products
+
+    """
+    c=a[...,0]*b[...,1]-a[...,1]*b[...,0]
+    return c
+
+def segment_cells(seg,cell):
+    """Get grid cells covered by bounding box of line segment.
+
+    Parameters
+    ----------
+    seg : single line segment
+    cell : grid cell size
+
+    Returns
+    -------
+    cells : iterator over grid cell indices
+
+    """
+    lo=np.floor(seg.min(0)/cell).astype('int')
+    hi=np.floor(seg.max(0)/cell).astype('int')
+    cells=itertools.product(range(lo[0],hi[0]+1),range(lo[1],hi[1]+1))
+    return cells
+
+def segment_insert(grid,seg,s,cell):
+    """Add line segment to grid index of segments.
+
+    Parameters
+    ----------
+    grid : dictionary of segment indices per grid cell
+    seg : single line segment
+    s : index of line segment
+    cell : grid cell size
+
+    Returns
+    -------
+    grid : updated grid index
+
+    """
+    for c in utils.segment_cells(seg,cell):
+        grid.setdefault(c,[]).append(s)
+    return grid
+
+def segment_query(grid,seg,cell):
+    """Get indexed line segments whose grid cells overlap with line segment.
+
+    Parameters
+    ----------
+    grid : dictionary of segment indices per grid cell
+    seg : single line segment
+    cell : grid cell size
+
+    Returns
+    -------
+    idx : sorted indices of nearby line segments
+
+    """
+    idx=set()
+    for c in utils.segment_cells(seg,cell):
+        idx.update(grid.get(c,[]))
+    idx=np.array(sorted(idx),dtype='int')
+    return idx
+
 def bounds(x,xmin,xmax):
     """Restrict number to interval.
 
@@ -240,18 +623,41 @@ def node_condense(imM,imG,ones):
 
     """
     imL,N=sp.ndimage.label(imM,structure=ones)                                  # label nodes
-    sizes=sp.ndimage.sum(imL>0,imL,range(1,N+1))                                # compute size of nodes (clusters)
+    sizes=np.bincount(imL.ravel(),minlength=N+1)                                # compute size of nodes (clusters)
     coms=sp.ndimage.center_of_mass(imG,imL,range(1,N+1))                        # compute center of mass of nodes (clusters)
-    for n in range(N):                                                          # for each node...
-        if(sizes[n]>1):                                                         # if cluster...
-            idx=(imL==n+1)                                                      # get cluster coordinates
-            idm=tuple(np.add(coms[n],0.5).astype('int'))                        # get center of mass coordinates
-            imL[idx]=0                                                          # remove node cluster 
-            imL[idm]=n+1                                                        # set node at center of mass 
+    clus=(sizes>1)                                                              # get clusters
+    clus[0]=False
+    idm=np.add(np.array(coms).reshape(-1,imL.ndim)[clus[1:]],0.5).astype('int') # get center of mass coordinates of clusters
+    imL[clus[imL]]=0                                                            # remove node clusters 
+    imL[tuple(idm.T)]=1                                                         # set nodes at center of mass 
     imL,N=sp.ndimage.label(imL>0,structure=ones)                                # label nodes
     imL=imL.astype('int')    
     return imL
 
+def remove_dark_objects(imC,imO,factr,ones):
+    """Remove components whose average intensity is below a fraction of the average intensity of all components.
+
+    Parameters
+    ----------
+    imC : binary image of components
+    imO : gray-scale intensity image
+    factr : fraction of average intensity below which components are removed
+    ones : array defining neighborhood structure
+    
+    Returns
+    -------
+    imA : image of remaining components (0 = background; 1 = components)
+
+    """
+    imL,N=sp.ndimage.label(imC,structure=ones)                                  # label components
+    mean=imO[imC].mean()                                                        # compute average intensity of all components
+    sizes=np.bincount(imL.ravel(),minlength=N+1)                                # compute size and average intensity of each component in a single pass
+    means=np.bincount(imL.ravel(),weights=imO.ravel(),minlength=N+1)/np.maximum(sizes,1)
+    keep=(means>=mean*factr)                                                    # look up components to keep
+    keep[0]=False
+    imA=1.0*keep[imL]
+    return imA
+
 def node_find(im):
     """Find nodes in binary filament image.
 
@@ -272,255 +678,850 @@ def node_find(im):
         if(L!=0 and L!=2):                                                      # if there is one (set end node) or more than two filaments (set crossing node)...
             val=1                                                               # set node
     return val
-  
-def connected_components(graph):
-    """Compute connected components of graph after removal of edges with capacities below 50th percentile.
+
+def node_offsets():
+    """Compute offsets and adjacency of the 26 neighbors of a pixel.
+
+    Returns
+    -------
+    offs : array of neighbor offsets in raster order of the 3x3x3 neighborhood
+    adjs : array of bit masks of face-adjacent neighbors for each neighbor
+
+    """
+    offs=np.array([o for o in itertools.product([-1,0,1],repeat=3) if o!=(0,0,0)]) # offsets of 26 neighbors (center excluded)
+    adjs=np.zeros(len(offs),dtype='int64')
+    for i,oi in enumerate(offs):                                                # for each neighbor...
+        for j,oj in enumerate(offs):
+            if(np.abs(oi-oj).sum()==1):                                         # if neighbors share a face...
+                adjs[i]|=1<<j                                                   # set bit of adjacent neighbor
+    return offs,adjs
+
+def node_count(codes,adjs):
+    """Count connected filaments in bit-packed 3x3x3 neighborhoods.
 
     Parameters
     ----------
-    graph : original graph
-    
+    codes : array of bit-packed neighborhoods (bit i = neighbor i is filament)
+    adjs : array of bit masks of face-adjacent neighbors for each neighbor
+
     Returns
     -------
-    ca : list of sizes of connected components
+    counts : number of connected filaments per neighborhood
 
     """
-    gc=graph.copy()
-    edges=gc.edges(data=True)
-    ec=1.0*np.array([d['capa'] for u,v,d in edges])
-    perc=np.percentile(ec,50.0)        
-    for u,v,d in edges:
-        if d['capa']<=perc:
-            gc.remove_edge(u,v)    
-    cc=nx.connected_components(gc)
-    ca=np.array([len(c) for c in cc])   
-    return ca
-   
-def path_lengths(graph):
-    """Compute shortest path lengths.
+    rem=np.array(codes,dtype='int64')                                           # remaining filament bits
+    counts=np.zeros(len(rem),dtype='int')
+    bits=np.arange(len(adjs))
+    while(rem.any()):                                                           # while there are unlabeled filament bits...
+        comp=rem&-rem                                                           # seed new filament at lowest remaining bit
+        grow=comp*0
+        while((grow!=comp).any()):                                              # grow filaments until they do not change
+            grow=comp
+            flag=(comp[:,np.newaxis]>>bits)&1                                   # get bits of current filaments
+            comp=comp|(np.bitwise_or.reduce(flag*adjs,axis=1)&rem)              # add face-adjacent filament bits
+        counts+=(rem>0)                                                         # count filament
+        rem&=~comp                                                              # remove filament
+    return counts
+
+def node_detect(imA):
+    """Find nodes in binary filament image using bit-packed neighborhoods.
+
+    Gives the same result as applying node_find to every pixel, but classifies
+    each distinct neighborhood configuration only once and evaluates filament
+    pixels only.
 
     Parameters
     ----------
-    graph : original graph
-    
+    imA : binary filament image
+
     Returns
     -------
-    dist : array of shortest path lengths
+    imM : binary node array (0 = background; 1 = nodes)
 
     """
-    dists=nx.all_pairs_dijkstra_path_length(graph,weight='lgth')
-    dist=np.array([[v for v in u.values()] for u in dists.values()])
-    dist=np.tril(dist)
-    dist[dist==0]=np.nan
-    return dist
-    
-def edge_angles(graph,pos,mask):
-    """Compute distribution of angles between network edges and cell axis.
+    crd,nbrs,labs,shape=utils.skeleton_sparse(imA>0)                            # get filament pixels and their neighbors
+    node=utils.skeleton_nodes(nbrs)                                             # classify neighborhoods
+    imM=np.zeros(imA.shape,dtype=imA.dtype)
+    imM[crd[node,0],crd[node,1],crd[node,2]]=1
+    return imM
+
+def skeleton_nodes(nbrs):
+    """Find nodes of sparse skeleton from bit-packed neighborhoods.
 
     Parameters
     ----------
-    graph : original graph
-    pos : node positions
-    mask : binary array of cellular region of interest
-    
+    nbrs : array of indices of neighboring pixels (see skeleton_neighbors)
+
     Returns
     -------
-    degs : list of angles between edges and cell axis
+    node : boolean array indicating end nodes (one filament) and crossing nodes (more than two filaments)
 
     """
-    c0,c1,vc,vd,an,rot=utils.mask2rot(mask)                             # compute angle of cell axis
-    degs=[]
-    for u,v,d in graph.edges(data=True):                                        # for each edge...
-        degs.append(np.mod(utils.angle360(1.0*(pos[u]-pos[v]))+360.0-an,180.0)) # compute angle between edge and cell axis
-    return degs
-
-def crossing_number(graph,pos): 
-    """Compute number of edge intersections per edge.
+    offs,adjs=utils.node_offsets()                                              # get neighbor offsets and adjacency
+    codes=np.zeros(len(nbrs),dtype='int64')
+    for i in range(len(offs)):                                                  # for each neighbor...
+        codes|=(nbrs[:,i]>=0).astype('int64')<<i                                # pack neighbor into bit code
+    uniq,inv=np.unique(codes,return_inverse=True)                               # get distinct neighborhood configurations
+    counts=utils.node_count(uniq,adjs)[inv.ravel()]                             # count filaments per configuration
+    node=(counts!=0)*(counts!=2)                                                # find nodes as endpoints or crossings of filaments
+    return node
+
+def skeleton_neighbors(ys,xs,zs,shape):
+    """Find neighboring pixels of sparse filament pixels.
 
     Parameters
     ----------
-    graph : original graph
-    pos : node positions
+    ys,xs,zs : coordinates of filament pixels in raster order
+    shape : image dimensions
     
     Returns
     -------
-    cns : list of edge crossing numbers
-
-    """      
-    ee=np.array(graph.edges())                                                  # get edge edges
-    edges=[]  
-    cns=[]
-    for i,(n1,n2) in enumerate(graph.edges_iter()):                             # for each edge...
-        edge=np.array([[pos[n1][0],pos[n1][1]],[pos[n2][0],pos[n2][1]]])        # append edge as line segment
-        edges.append(edge)        
-    for i,(n1,n2) in enumerate(graph.edges_iter()):                             # for each edge...
-        idx=(ee[:,0]!=n1)*(ee[:,1]!=n1)*(ee[:,0]!=n2)*(ee[:,1]!=n2)             # exclude edge that share a node with the selected edge
-        idx[i]=False                                                            # exclude selected edge itself
-        edge=np.array([[pos[n1][0],pos[n1][1]],[pos[n2][0],pos[n2][1]]])        # treat edge as line segment
-        cross=utils.multi_line_intersect(np.array(edge),np.array(edges)[idx]) # check intersections of selected edge with remaining edges
-        cns.append(cross.sum())                                                 # append crossing number of selected edge
-    return cns        
-   
-#%%############################################################################# graph functions   
+    nbrs : array of indices of the 26 neighbors of each pixel in raster order of the 3x3x3 neighborhood (-1 = no filament)
 
-def skeletonize_graph(imO,mask,sigma,block,small,factr):  
-    """Filter and skeletonize image of filament structures.
+    """
+    offs,adjs=utils.node_offsets()                                              # get neighbor offsets
+    ly,lx,lz=shape
+    idx=np.ravel_multi_index((ys,xs,zs),shape)                                  # get sorted linear pixel indices
+    nbrs=-np.ones((len(idx),len(offs)),dtype='int32')
+    for i,(dy,dx,dz) in enumerate(offs):                                        # for each neighbor...
+        y,x,z=ys+dy,xs+dx,zs+dz
+        ok=(y>=0)*(y<ly)*(x>=0)*(x<lx)*(z>=0)*(z<lz)                            # crop neighborhood at the borders of the image
+        jdx=np.ravel_multi_index((y[ok],x[ok],z[ok]),shape)
+        j=np.minimum(np.searchsorted(idx,jdx),len(idx)-1)                       # look up neighbor among filament pixels
+        hit=(idx[j]==jdx)
+        nbrs[np.where(ok)[0][hit],i]=j[hit]
+    return nbrs
+
+def skeleton_sparse(im):
+    """Convert image of filament structures to sparse skeleton.
 
     Parameters
     ----------
-    imO : original image
-    mask : binary array of cellular region of interest
-    sigma : width of tubeness filter and filament structures
-    block : block size of adaptive median filter
-    small : size of smallest components
-    factr : fraction of average intensity below which components are removed
+    im : image indicating background (=0), filaments (=1), and labeled nodes (>1)
     
     Returns
     -------
-    imR : image after application of tubeness filter
-    imA : filtered and skeletonized image
+    skel : sparse skeleton as tuple of pixel coordinates (y,x,z) in raster order, 
+        indices of neighboring pixels (see skeleton_neighbors), pixel values, and image dimensions
 
-    """    
-    imO-=imO[mask].min()
-    imO*=255.0/imO.max()
-    ly,lx,lz=imO.shape
-    imR=imO.copy()*0
-    imT=imO.copy()*0
-    for z in range(lz):
-        imR[:,:,z]=tube_filter(imO[:,:,z],sigma)    
-        imT[:,:,z]=skimage.filters.threshold_adaptive(imR[:,:,z],block)
-    imS=skimage.morphology.skeletonize_3d(imT>0)   
-    ones=np.ones((3,3,3)) 
-    imC=skimage.morphology.remove_small_objects(imS,small,connectivity=2)>0
-    for z in range(lz):
-        imC[:,:,z]=imC[:,:,z]*mask
-    imC=imC>0
-    imL,N=sp.ndimage.label(imC,structure=ones)
-    mean=imO[imC].mean()
-    means=[np.mean(imO[imL==n]) for n in range(1,N+1)]                                
-    imA=1.0*imC.copy()
-    for n in range(1,N+1):        
-        if(means[n-1]<mean*factr):
-            imA[imL==n]=0    
-    imA=skimage.morphology.remove_small_objects(imA>0,2,connectivity=8)
-    return imR,imA
+    """
+    ys,xs,zs=np.where(im>0)                                                     # get filament and node pixels in raster order
+    crd=np.array([ys,xs,zs],dtype='int32').T
+    nbrs=utils.skeleton_neighbors(ys,xs,zs,im.shape)                            # get neighboring pixels
+    labs=im[ys,xs,zs].astype('int')                                             # get pixel values
+    return crd,nbrs,labs,im.shape
 
-def node_graph(imA,imG):  
-    """Construct image indicating background (=0), filaments (=1), and labeled nodes (>1).
+def skeleton_dense(skel):
+    """Convert sparse skeleton to image of filament structures.
 
     Parameters
     ----------
-    imA : skeletonized image of filament structures
-    imG : Gaussian filtered image of filament structures
+    skel : sparse skeleton (see skeleton_sparse)
     
     Returns
     -------
-    imE : image indicating background, filaments, and nodes
+    im : image indicating background (=0), filaments (=1), and labeled nodes (>1)
 
-    """        
-    ones=np.ones((3,3,3))                                                       # neighborhood structure of pixel
-    imM=sp.ndimage.generic_filter(imA,utils.node_find,footprint=ones,mode='constant',cval=0) # find nodes as endpoints or crossings of filaments  
-    imN=utils.node_condense(imM,imG,ones)                               # condense neighboring nodes 
-    imL=skimage.segmentation.relabel_sequential(imN)[0]                         # relabel nodes    
-    imB,B=sp.ndimage.label(imA,structure=ones)                                  # label components of skeletoninzed image
-    for b in range(1,B+1):                                                      # for each component...
-        no=np.max((imB==b)*(imL>0))                                             # if component does not contain node...
-        if(no==0):
-            imA[imB==b]=0                                                       # remove component    
-    imE=1*((imA+imL)>0)+imL                                                     # construct image indicating background (=0) filaments (=1) and labeled nodes (>1).    
-    return imE
-  
-def make_graph(imE,imG):    
-    """Construct network representation from image of filament structures.
+    """
+    crd,nbrs,labs,shape=skel
+    im=np.zeros(shape,dtype='int')
+    im[crd[:,0],crd[:,1],crd[:,2]]=labs
+    return im
+
+def skeleton_label(nbrs,sel):
+    """Label connected components of sparse skeleton pixels.
 
     Parameters
     ----------
-    imE : image indicating background (=0), filaments (=1), and labeled nodes (>1)
-    imG : Gaussian filtered image of filament structures
+    nbrs : indices of neighboring pixels (see skeleton_neighbors)
+    sel : Boolean array of selected pixels
+    
+    Returns
+    -------
+    labl : component labels in raster order (0 = not selected; 1-L = components)
+    L : number of components
+
+    """
+    idx=np.where(sel)[0]                                                        # get selected pixels
+    I=len(idx)
+    labl=np.zeros(len(sel),dtype='int')
+    if(I==0):
+        return labl,0
+    imap=-np.ones(len(sel)+1,dtype='int')                                       # map pixels to selected pixels (last entry for missing neighbors)
+    imap[idx]=np.arange(I)
+    r,k=np.where(nbrs[idx]>=0)
+    c=imap[nbrs[idx][r,k]]
+    ok=(c>=0)
+    adj=sp.sparse.coo_matrix((np.ones(ok.sum()),(r[ok],c[ok])),shape=(I,I))     # adjacency matrix of selected pixels
+    L,comp=sp.sparse.csgraph.connected_components(adj,directed=False)           # compute connected components
+    first=np.unique(comp,return_index=True)[1]                                  # order components by their first pixel in raster order
+    rank=np.zeros(L,dtype='int')
+    rank[np.argsort(first)]=np.arange(L)
+    labl[idx]=rank[comp]+1
+    return labl,L
+
+def connected_components(graph,table=None):
+    """Compute connected components of graph after removal of edges with capacities below 50th percentile.
+
+    Parameters
+    ----------
+    graph : original graph
+    table : edge table of graph with capacities (None = convert graph)
+    
+    Returns
+    -------
+    ca : list of sizes of connected components
+
+    """
+    if(table is None):
+        table=utils.edge_table(graph,['capa'])
+    perc=np.percentile(table['capa'],50.0)        
+    table=table[table['capa']>perc]                                             # remove edges with capacities below 50th percentile
+    C,labels=sp.sparse.csgraph.connected_components(utils.graph_matrix(graph,'capa','sum',table),directed=False)
+    ca=np.bincount(labels)   
+    return ca
+   
+def edge_table(graph,keys=None):
+    """Convert edges of graph to columnar edge table.
+
+    Parameters
+    ----------
+    graph : original graph
+    keys : list of edge properties (None = all edge properties)
+    
+    Returns
+    -------
+    table : structured array with node indices src and dst (int32) and one column per edge property (float64) in edge order
+
+    """
+    index=dict((n,i) for i,n in enumerate(graph.nodes()))                       # map nodes to indices in node order
+    edges=list(graph.edges(data=True))
+    if(keys is None):
+        keys=sorted(set(k for u,v,d in edges for k in d.keys()))
+    table=np.zeros(len(edges),dtype=[('src','int32'),('dst','int32')]+[(k,'float64') for k in keys])
+    table['src']=[index[u] for u,v,d in edges]
+    table['dst']=[index[v] for u,v,d in edges]
+    for k in keys:                                                              # missing edge properties are NaN
+        table[k]=[d.get(k,np.nan) for u,v,d in edges]
+    return table
+
+def edge_write(graph,columns):
+    """Write columns of edge properties to edges of graph.
+
+    Parameters
+    ----------
+    graph : original graph
+    columns : dictionary of arrays of edge properties in edge order
+    
+    Returns
+    -------
+    graph : graph with updated edge properties
+
+    """
+    keys=list(columns.keys())
+    values=zip(*[np.asarray(columns[k]).tolist() for k in keys])
+    for (u,v,d),vals in zip(graph.edges(data=True),values):                     # update edge properties in a single pass
+        d.update(zip(keys,vals))
+    return graph
+
+def table_graph(table,N,multi=0):
+    """Convert columnar edge table to graph.
+
+    Parameters
+    ----------
+    table : structured array of edges (see edge_table)
+    N : number of nodes
+    multi : construct simple graph (=0) or multigraph (=1)
+    
+    Returns
+    -------
+    graph : graph with nodes 0...N-1 and edge properties from table
+
+    """
+    graph=nx.empty_graph(N,nx.MultiGraph() if multi else nx.Graph())
+    keys=[k for k in table.dtype.names if k not in ('src','dst')]
+    values=zip(*[table[k].tolist() for k in keys])
+    graph.add_edges_from((u,v,dict(zip(keys,vals))) for u,v,vals in zip(table['src'].tolist(),table['dst'].tolist(),values))
+    return graph
+
+def graph_matrix(graph,weight='lgth',parallel='min',table=None):
+    """Convert graph to symmetric sparse matrix of edge weights.
+
+    Parameters
+    ----------
+    graph : original graph
+    weight : edge property used as matrix entries
+    parallel : keep smallest weight (='min') or sum weights (='sum') of parallel edges
+    table : edge table of graph (None = convert graph)
+    
+    Returns
+    -------
+    A : sparse CSR matrix of edge weights in node order (self-loops are ignored)
+
+    """
+    N=graph.number_of_nodes()
+    if(table is None):
+        table=utils.edge_table(graph,[weight])
+    table=table[table['src']!=table['dst']]
+    u=np.minimum(table['src'],table['dst']).astype('int')
+    v=np.maximum(table['src'],table['dst']).astype('int')
+    w=table[weight]
+    if(parallel=='min'):                                                        # keep shortest of parallel edges
+        isort=np.lexsort((w,v,u))
+        u,v,w=u[isort],v[isort],w[isort]
+        idx=np.ones(len(u),dtype='bool')
+        idx[1:]=(u[1:]!=u[:-1])+(v[1:]!=v[:-1])
+        u,v,w=u[idx],v[idx],w[idx]
+    A=sp.sparse.coo_matrix((np.hstack([w,w]),(np.hstack([u,v]),np.hstack([v,u]))),shape=(N,N)).tocsr() # symmetrize and sum duplicates
+    return A
+
+def path_lengths(graph,dtype='float64',chunk=256):
+    """Compute shortest path lengths.
+
+    Parameters
+    ----------
+    graph : original graph
+    dtype : data type of path lengths
+    chunk : number of source nodes processed at once
+    
+    Returns
+    -------
+    dist : array of shortest path lengths (lower triangle in node order, NaN otherwise)
+
+    """
+    A=utils.graph_matrix(graph,'lgth','min')                                    # convert graph once to sparse matrix of edge lengths
+    N=A.shape[0]
+    dist=np.zeros((N,N),dtype=dtype)
+    for i in range(0,N,chunk):                                                  # compute distances from blocks of source nodes
+        dist[i:i+chunk]=sp.sparse.csgraph.dijkstra(A,directed=False,indices=np.arange(i,min(i+chunk,N)))
+    dist=np.tril(dist)
+    dist[dist==0]=np.nan
+    dist[np.isinf(dist)]=np.nan                                                 # ignore pairs of disconnected nodes
+    return dist
+
+def path_stats(graph,dtype='float64',chunk=256,A=None):
+    """Compute mean and standard deviation of shortest path lengths without storing all path lengths.
+
+    Parameters
+    ----------
+    graph : original graph
+    dtype : data type of path lengths
+    chunk : number of source nodes processed at once
+    A : sparse matrix of edge lengths (None = convert graph)
+    
+    Returns
+    -------
+    distMU : average shortest path length
+    distSD : standard deviation of shortest path lengths
+
+    """
+    if(A is None):
+        A=utils.graph_matrix(graph,'lgth','min')
+    N=A.shape[0]
+    n,distMU,M2=0,0.0,0.0                                                       # running count, mean, and sum of squared deviations
+    for i in range(0,N,chunk):                                                  # reduce distances from blocks of source nodes
+        dist=sp.sparse.csgraph.dijkstra(A,directed=False,indices=np.arange(i,min(i+chunk,N))).astype(dtype)
+        dist=dist[np.isfinite(dist)*(dist>0)]                                   # ignore source nodes themselves and disconnected nodes
+        if(len(dist)>0):                                                        # merge block statistics into running statistics
+            nc=len(dist)
+            mc=np.mean(dist,dtype='float64')
+            delta=mc-distMU
+            distMU+=delta*nc/(n+nc)
+            M2+=np.sum(np.square(dist-mc,dtype='float64'))+delta**2*n*nc/(n+nc)
+            n+=nc
+    distMU=distMU if n>0 else np.nan
+    distSD=np.sqrt(M2/n) if n>0 else np.nan
+    return distMU,distSD
+    
+def path_sample(graph,tol=0.05,conf=0.95,batch=32,strata=0,boots=200,rng=None,A=None):
+    """Estimate mean and coefficient of variation of shortest path lengths from sampled source nodes.
+
+    Parameters
+    ----------
+    graph : original graph
+    tol : relative width of confidence intervals at which sampling stops
+    conf : confidence level
+    batch : smallest number of source nodes sampled per step (steps grow with the number of sampled nodes)
+    strata : sample source nodes uniformly (=0) or stratified by connected component (=1)
+    boots : number of bootstrap samples for confidence intervals
+    rng : random number generator (numpy RandomState; None = global random state)
+    A : sparse matrix of edge lengths (None = convert graph)
+    
+    Returns
+    -------
+    distMU : estimated average shortest path length
+    distCV : estimated coefficient of variation of shortest path lengths
+    ciMU : confidence interval of average shortest path length
+    ciCV : confidence interval of coefficient of variation
+    K : number of sampled source nodes (all nodes = exact statistics)
+
+    """
+    if(rng is None):
+        rng=np.random
+    if(A is None):
+        A=utils.graph_matrix(graph,'lgth','min')
+    N=A.shape[0]
+    if(strata):                                                                 # group nodes into strata
+        S,labels=sp.sparse.csgraph.connected_components(A,directed=False)
+    else:
+        S,labels=1,np.zeros(N,dtype='int')
+    order=[rng.permutation(np.where(labels==c)[0]) for c in range(S)]           # random sampling order of source nodes per stratum
+    sizes=np.array([len(o) for o in order])
+    taken=np.zeros(S,dtype='int')                                               # number of sampled source nodes per stratum
+    stats=[[] for c in range(S)]                                                # pair count, sum, and sum of squares per sampled source node
+    alpha=100.0*(1.0-conf)/2.0
+    while(True):
+        step=max(batch,taken.sum()//2)
+        for c in range(S):                                                      # sample next source nodes in proportion to stratum size
+            k=max(1,int(round(1.0*step*sizes[c]/N)))
+            idx=order[c][taken[c]:taken[c]+k]
+            if(len(idx)>0):
+                dist=sp.sparse.csgraph.dijkstra(A,directed=False,indices=idx)
+                dist[~(np.isfinite(dist)*(dist>0))]=0                           # ignore source nodes themselves and disconnected nodes
+                stats[c]+=list(zip((dist>0).sum(1),dist.sum(1),np.square(dist).sum(1)))
+                taken[c]+=len(idx)
+        full=(taken==sizes)
+        tots=[]                                                                 # weighted totals of pair counts, sums, and sums of squares per stratum and bootstrap sample
+        for c in range(S):
+            st=np.array(stats[c]).reshape(-1,3)
+            w=1.0*sizes[c]/max(1,taken[c])                                      # weight source nodes by inverse sampling fraction
+            if(full[c]):                                                        # exhaustively sampled strata have no sampling error
+                b=np.tile(st.sum(0),(boots+1,1))
+            else:
+                ib=rng.randint(0,taken[c],(boots,taken[c]))
+                b=np.vstack([st.sum(0),st[ib].sum(1)])
+            tots.append(w*b)
+        tots=np.sum(tots,axis=0)
+        with np.errstate(invalid='ignore',divide='ignore'):
+            mu=tots[:,1]/tots[:,0]
+            cv=np.sqrt(np.maximum(0.0,tots[:,2]/tots[:,0]-mu**2))/mu
+        distMU,distCV=mu[0],cv[0]
+        fpc=np.sqrt(1.0-1.0*taken.sum()/N)                                      # shrink bootstrap deviations by finite population correction
+        mu[1:]=distMU+fpc*(mu[1:]-distMU)
+        cv[1:]=distCV+fpc*(cv[1:]-distCV)
+        if(np.all(full)):                                                       # statistics are exact if all source nodes were sampled
+            ciMU,ciCV=(distMU,distMU),(distCV,distCV)
+            break
+        ciMU=tuple(np.nanpercentile(mu[1:],[alpha,100.0-alpha]))
+        ciCV=tuple(np.nanpercentile(cv[1:],[alpha,100.0-alpha]))
+        if(ciMU[1]-ciMU[0]<tol*distMU and ciCV[1]-ciCV[0]<tol*distCV):          # stop once confidence intervals are narrow enough
+            break
+    K=taken.sum()
+    return distMU,distCV,ciMU,ciCV,K
+
+def algebraic_connectivity(graph,tol=1e-8,A=None,dense=100):
+    """Compute algebraic connectivity as second smallest eigenvalue of weighted graph Laplacian.
+
+    Parameters
+    ----------
+    graph : original graph
+    tol : relative accuracy of eigenvalue
+    A : sparse matrix of edge capacities (None = convert graph)
+    dense : number of nodes below which the dense Laplacian is diagonalized
+    
+    Returns
+    -------
+    ac : algebraic connectivity
+
+    """
+    if(A is None):
+        A=utils.graph_matrix(graph,'capa','sum')                                # sum capacities of parallel edges as in networkx Laplacian
+    N=A.shape[0]
+    L=sp.sparse.csgraph.laplacian(A.tocsc())
+    if(N<dense):                                                                # diagonalize dense Laplacian of tiny graphs
+        ac=np.sort(np.linalg.eigvalsh(L.toarray()))[1]
+    else:                                                                       # find two smallest eigenvalues by shift-invert around small negative shift
+        shift=-1e-3*L.diagonal().mean()
+        vals=sp.sparse.linalg.eigsh(L,k=2,sigma=shift,which='LM',tol=tol,return_eigenvectors=False)
+        ac=np.sort(vals)[1]
+    return ac
+
+def flow_betweenness(graph,weight='capa',block=256,samples=0,conf=0.95,rng=None,table=None):
+    """Compute edge current-flow betweenness from a single factorization of the grounded Laplacian.
+
+    Parameters
+    ----------
+    graph : original graph (connected, without parallel edges)
+    weight : edge property used as conductance
+    block : number of right-hand sides solved at once (bounds memory to nodes x block)
+    samples : number of sampled source nodes for approximate betweenness (0 = exact, otherwise at least 2)
+    conf : confidence level of error bound of approximate betweenness
+    rng : random number generator for sampling (numpy RandomState; None = global random state)
+    table : edge table of graph with weight column (None = convert graph)
+    
+    Returns
+    -------
+    efb : array of normalized edge current-flow betweenness as in networkx in edge order
+    err : bound on absolute error of approximate betweenness at given confidence (0 = exact)
+
+    """
+    if(samples<0 or samples==1):
+        raise ValueError('flow betweenness requires at least two sampled source nodes (samples=%d)'%samples)
+    if(rng is None):
+        rng=np.random
+    N=graph.number_of_nodes()
+    if(table is None):
+        table=utils.edge_table(graph,[weight])
+    E=len(table)
+    u,v,w=table['src'],table['dst'],table[weight]
+    L=sp.sparse.csgraph.laplacian(utils.graph_matrix(graph,weight,'sum',table))
+    lu=sp.sparse.linalg.splu(sp.sparse.csc_matrix(L)[1:,1:])                    # factorize Laplacian grounded at first node once
+    nb=(N-1.0)*(N-2.0)                                                          # normalization factor of networkx
+    if(samples==0 or samples>=N):                                               # solve for potentials induced by unit currents through blocks of edges
+        efb=np.zeros(E)
+        coef=2.0*np.arange(N)-N+1.0                                             # sum of absolute flow differences over all pairs of sorted flows
+        for i in range(0,E,block):
+            j=min(i+block,E)
+            rhs=np.zeros((N,j-i))
+            rhs[u[i:j],np.arange(j-i)]=w[i:j]
+            rhs[v[i:j],np.arange(j-i)]-=w[i:j]
+            row=np.zeros((N,j-i))
+            row[1:]=lu.solve(rhs[1:])                                           # flows through edges for unit currents injected at each node
+            efb[i:j]=np.dot(coef,np.sort(row,axis=0))/nb
+        err=0.0
+    else:                                                                       # solve for potentials of sampled source nodes in blocks otherwise
+        S=rng.choice(N,samples,replace=False)
+        pot=np.zeros((N,samples))
+        for i in range(0,samples,block):
+            j=min(i+block,samples)
+            rhs=np.zeros((N,j-i))
+            rhs[S[i:j],np.arange(j-i)]=1.0
+            pot[1:,i:j]=lu.solve(rhs[1:])
+        coef=2.0*np.arange(samples)-samples+1.0
+        efb=np.zeros(E)
+        for i in range(0,E,block):                                              # average absolute flows over pairs of sampled source nodes
+            j=min(i+block,E)
+            row=w[i:j,None]*(pot[u[i:j]]-pot[v[i:j]])
+            efb[i:j]=np.dot(np.sort(row,axis=1),coef)/(0.5*samples*(samples-1.0))
+        scale=0.5*N*(N-1.0)/nb                                                  # scale average over pairs to normalized betweenness
+        efb*=scale
+        err=scale*np.sqrt(np.log(2.0/(1.0-conf))/(2.0*(samples//2)))            # Hoeffding bound for U-statistics of flows between zero and one
+    return efb,err
+
+def edge_centralities(graph,weight='capa',alpha=0.85,tol=1e-6,maxiter=100,table=None):
+    """Compute degree, eigenvector, and page rank centralities of line graph without constructing it.
+
+    Parameters
+    ----------
+    graph : original graph (without parallel edges)
+    weight : edge property whose node sums weight line graph edges at shared nodes
+    alpha : damping parameter of page rank
+    tol : error tolerance of page rank
+    maxiter : maximum number of page rank iterations
+    table : edge table of graph with weight column (None = convert graph)
+    
+    Returns
+    -------
+    ndg : array of weighted line graph degrees of edges in edge order
+    nec : array of line graph eigenvector centralities of edges in edge order
+    npr : array of line graph page ranks of edges in edge order
+
+    """
+    N=graph.number_of_nodes()
+    if(table is None):
+        table=utils.edge_table(graph,[weight])
+    E=len(table)
+    u,v=table['src'],table['dst']
+    degree=utils.graph_matrix(graph,weight,'sum',table).sum(1).A1               # get weighted node degrees of original graph
+    B=sp.sparse.csr_matrix((np.ones(2*E),(np.hstack([u,v]),np.hstack([np.arange(E),np.arange(E)]))),shape=(N,E)) # node-edge incidence matrix
+    diag=degree[u]+degree[v]
+    def adjacency(x):                                                           # multiply with line graph adjacency B.T*diag(degree)*B-diag(degree[u]+degree[v])
+        x=np.asarray(x).reshape(E,-1)
+        return B.T.dot(degree[:,None]*B.dot(x))-diag[:,None]*x
+    ndg=adjacency(np.ones(E)).ravel()                                           # weighted line graph degree
+    if(E>2):                                                                    # largest eigenvector of line graph adjacency
+        A=sp.sparse.linalg.LinearOperator((E,E),matvec=adjacency,matmat=adjacency,dtype='float')
+        vals,vecs=sp.sparse.linalg.eigsh(A,k=1,which='LA',tol=0)
+        vec=vecs[:,0]
+    else:
+        A=adjacency(np.eye(E))
+        vals,vecs=np.linalg.eigh(A)
+        vec=vecs[:,-1]
+    nec=vec/(np.sign(vec.sum())*np.linalg.norm(vec))
+    x=np.ones(E)/E                                                              # page rank by power iteration as in networkx
+    dangling=(ndg==0)
+    outs=np.where(dangling,1.0,ndg)
+    for i in range(maxiter):
+        xlast=x
+        x=alpha*(adjacency(xlast/outs).ravel()+xlast[dangling].sum()/E)+(1.0-alpha)/E
+        if(np.abs(x-xlast).sum()<E*tol):
+            break
+    npr=x
+    return ndg,nec,npr
+
+def edge_angles(graph,pos,mask):
+    """Compute distribution of angles between network edges and cell axis.
+
+    Parameters
+    ----------
+    graph : original graph
+    pos : node positions
+    mask : binary array of cellular region of interest
+    
+    Returns
+    -------
+    degs : list of angles between edges and cell axis
+
+    """
+    c0,c1,vc,vd,an,rot=utils.mask2rot(mask)                             # compute angle of cell axis
+    degs=[]
+    for u,v,d in graph.edges(data=True):                                        # for each edge...
+        degs.append(np.mod(utils.angle360(1.0*(pos[u]-pos[v]))+360.0-an,180.0)) # compute angle between edge and cell axis
+    return degs
+
+def crossing_number(graph,pos): 
+    """Compute number of edge intersections per edge.
+
+    Parameters
+    ----------
+    graph : original graph
+    pos : node positions
+    
+    Returns
+    -------
+    cns : list of edge crossing numbers
+
+    """      
+    ee=np.array(list(graph.edges())).reshape(-1,2)                              # get edge edges
+    E=len(ee)
+    segs=np.array([[[pos[n1][0],pos[n1][1]],[pos[n2][0],pos[n2][1]]] for n1,n2 in ee],dtype='float').reshape(-1,2,2) # treat edges as line segments
+    cell=max(1.0,np.median(np.linalg.norm(segs[:,1]-segs[:,0],axis=1))) if E>0 else 1.0 # set grid cell size to typical edge length
+    grid={}
+    for i in range(E):                                                          # bucket line segments by grid cells of their bounding boxes
+        utils.segment_insert(grid,segs[i],i,cell)
+    pairs=[np.zeros((2,0),dtype='int')]
+    for idx in grid.values():                                                   # collect pairs of line segments sharing a grid cell
+        if(len(idx)>1):
+            ii,jj=np.triu_indices(len(idx),1)
+            pairs.append(np.array(idx)[[ii,jj]])
+    pairs=np.unique(np.hstack(pairs),axis=1)                                    # count each pair only once
+    i,j=pairs
+    idx=(ee[i,0]!=ee[j,0])*(ee[i,1]!=ee[j,0])*(ee[i,0]!=ee[j,1])*(ee[i,1]!=ee[j,1]) # exclude edges that share a node
+    i,j=i[idx],j[idx]
+    cross=utils.multi_line_intersect(segs[i],segs[j])                           # check intersections of paired line segments
+    cns=np.bincount(i[cross],minlength=E)+np.bincount(j[cross],minlength=E)     # count crossings of both edges of each intersecting pair
+    return list(cns)        
+   
+#%%############################################################################# graph functions   
+
+def normalize_image(imO,mask):
+    """Scale intensities of image in place to the range from 0 to 255, with the minimum taken within the cellular region of interest.
+
+    Parameters
+    ----------
+    imO : original image
+    mask : binary array of cellular region of interest
+    
+    Returns
+    -------
+    imO : scaled image
+
+    """
+    imO-=imO[mask].min()
+    imO*=255.0/imO.max()
+    return imO
+
+def skeletonize_graph(imO,mask,sigma,block,small,factr,dtype='float64'):  
+    """Filter and skeletonize image of filament structures.
+
+    Parameters
+    ----------
+    imO : original image
+    mask : binary array of cellular region of interest
+    sigma : width of tubeness filter and filament structures
+    block : block size of adaptive median filter
+    small : size of smallest components
+    factr : fraction of average intensity below which components are removed
+    dtype : precision of tubeness filter ('float64' or 'float32')
+    
+    Returns
+    -------
+    imR : image after application of tubeness filter
+    imA : filtered and skeletonized image
+
+    """    
+    utils.normalize_image(imO,mask)                                             # scale intensities in place
+    ly,lx,lz=imO.shape
+    imR=utils.tube_filter_stack(imO,sigma,dtype=dtype)                          # apply tubeness filter to all slices
+    imT=utils.threshold_stack(imR,block)                                        # apply adaptive threshold to all slices
+    imS=skimage.morphology.skeletonize_3d(imT>0)   
+    ones=np.ones((3,3,3)) 
+    imC=skimage.morphology.remove_small_objects(imS,small,connectivity=2)>0
+    for z in range(lz):
+        imC[:,:,z]=imC[:,:,z]*mask
+    imC=imC>0
+    imA=utils.remove_dark_objects(imC,imO,factr,ones)
+    imA=skimage.morphology.remove_small_objects(imA>0,2,connectivity=8)
+    return imR,imA
+
+def node_graph(imA,imG):  
+    """Construct image indicating background (=0), filaments (=1), and labeled nodes (>1).
+
+    Parameters
+    ----------
+    imA : skeletonized image of filament structures or sparse skeleton (see skeleton_sparse)
+    imG : Gaussian filtered image of filament structures
+    
+    Returns
+    -------
+    imE : image or sparse skeleton indicating background, filaments, and nodes
+
+    """        
+    if(not isinstance(imA,tuple)):                                              # if dense image...
+        skel=utils.node_graph(utils.skeleton_sparse(imA>0),imG)                 # run on sparse skeleton
+        imE=utils.skeleton_dense(skel)
+        return imE
+    crd,nbrs,labs,shape=imA
+    node=utils.skeleton_nodes(nbrs)                                             # find nodes as endpoints or crossings of filaments
+    labn,N=utils.skeleton_label(nbrs,node)                                      # label neighboring nodes
+    idn=np.where(node)[0]
+    ln=labn[idn]-1
+    its=imG[crd[idn,0],crd[idn,1],crd[idn,2]]
+    sizes=np.bincount(ln,minlength=N)                                           # compute size of nodes (clusters)
+    norm=np.bincount(ln,weights=its,minlength=N)
+    coms=np.array([np.bincount(ln,weights=its*crd[idn,d],minlength=N)/norm for d in range(3)]).T # compute center of mass of nodes (clusters)
+    coms=np.add(coms,0.5).astype('int')
+    crdn=np.vstack([crd[idn[sizes[ln]==1]],coms[sizes>1]])                      # condense clusters to single node located at center of mass
+    shape=tuple(shape)
+    idx=np.ravel_multi_index(tuple(crd.T),shape)                                # get linear indices of filament and node pixels
+    idn=np.unique(np.ravel_multi_index(tuple(crdn.T),shape))
+    labb,B=utils.skeleton_label(nbrs,np.ones(len(crd),dtype='bool'))            # label components of skeleton
+    keep=np.bincount(labb[np.isin(idx,idn)],minlength=B+1)>0                    # keep components that contain condensed nodes
+    idx=np.union1d(idx[keep[labb]],idn)                                         # merge filament and node pixels
+    ys,xs,zs=np.unravel_index(idx,shape)
+    crd=np.array([ys,xs,zs],dtype='int32').T
+    nbrs=utils.skeleton_neighbors(ys,xs,zs,shape)                               # get neighboring pixels
+    labl,N=utils.skeleton_label(nbrs,np.isin(idx,idn))                          # label condensed nodes
+    labs=1+labl                                                                 # construct sparse skeleton indicating filaments (=1) and labeled nodes (>1)
+    return crd,nbrs,labs,shape
+  
+def make_graph(imE,imG,table=0):    
+    """Construct network representation from image of filament structures.
+
+    Parameters
+    ----------
+    imE : image or sparse skeleton (see skeleton_sparse) indicating background (=0), filaments (=1), and labeled nodes (>1)
+    imG : Gaussian filtered image of filament structures
+    table : return edge table of graph (=1) or not (=0)
     
     Returns
     -------
     graph : network representation of filament structures
     pos : node positions
+    table : structured array of edges (see edge_table), only if table=1
 
     """        
-    N=imE.max()-1                                                               # number of nodes
-    sq2=np.sqrt(2.0)                                                            # distance between diagonal pixels
-    sq3=np.sqrt(3.0)                                                            # distance between room diagonal pixels
-    diag=np.array([[[sq3,sq2,sq3],[sq2,1,sq2],[sq3,sq2,sq3]],[[sq2,1,sq2],[1,0,1],[sq2,1,sq2]],[[sq3,sq2,sq3],[sq2,1,sq2],[sq3,sq2,sq3]]]) # distance matrix of 3x3x3 neighborhood     
-    pos=np.array(np.where(imE>1)).T[:,::-1].astype('int')                       # node positions
-    pos=pos[:,[1,2,0]]                                                          # change order of node positions (x,y,z)    
-    imY=imE.copy()                                                              # array to propagate nodes
-    imL=1.0*(imE.copy()>0)                                                      # array to remember summed length of filament up to current position
-    imS=1.0*(imE.copy()>0)                                                      # array to remember summed intensity of filament up to current position 
-    ly,lx,lz=imE.shape                                                          # get image dimensions
-    ys=(imY==1).sum()                                                           # get points in image which are neither background (=0), nor nodes (>1), but filament (=1)     
-    while(ys>0):                                                                # while there is still "filament" in the image        
-        c=np.transpose(np.where(imY>1))                                         # positions of node pixels (>1)      
-        for y,x,z in c:                                                         # for each node pixel (>1)...
-            xmin,xmax=utils.bounds(x-1,0,lx),utils.bounds(x+2,0,lx) # consider 3x3x3 neighborhood around our pixel of interest which is cropped at the borders of the image
-            ymin,ymax=utils.bounds(y-1,0,ly),utils.bounds(y+2,0,ly)
-            zmin,zmax=utils.bounds(z-1,0,lz),utils.bounds(z+2,0,lz)     
-            sec=imY[ymin:ymax,xmin:xmax,zmin:zmax]                              # get 3x3x3 neighborhood of node array
-            lgt=imL[ymin:ymax,xmin:xmax,zmin:zmax]                              # get 3x3x3 neighborhood of filament length array
-            stg=imS[ymin:ymax,xmin:xmax,zmin:zmax]                              # get 3x3x3 neighborhood of filament intensity array
-            imY[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(sec==1,imY[y,x,z],sec)  # if 3x3x3 neighborhood contains node (>1) set all filament pixels to this node index
-            imL[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(lgt==1,diag[0:ymax-ymin,0:xmax-xmin,0:zmax-zmin]+imL[y,x,z],lgt) # if 3x3x3 neighborhood contains filament, increase straight/diagonal/room diagonal surrounding pixels in length array by 1/sqrt(2)/sqrt(3), respectively
-            imS[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(stg==1,imG[y,x,z]+imS[y,x,z],stg)  # if 3x3x3 neighborhood contains filament, increase intensity array by intensity of the original image
-        ys=(imY==1).sum()                                                       # compute remaining amout of filament         
-    graph=nx.empty_graph(N,nx.MultiGraph())                                     # create empty multi graph
-    ys,xs,zs=np.where(imY>1)                                                    # get all labeled filament pixels
-    for y,x,z in zip(ys,xs,zs):                                                 # for each labeled filament pixel...
-        xy=imY[y,x,z]                                                           # get node index  
-        xmin,xmax=utils.bounds(x-1,0,lx),utils.bounds(x+2,0,lx) # consider 3x3x3 neighborhood around our pixel of interest which is cropped at the borders of the image
-        ymin,ymax=utils.bounds(y-1,0,ly),utils.bounds(y+2,0,ly)
-        zmin,zmax=utils.bounds(z-1,0,lz),utils.bounds(z+2,0,lz)    
-        sec=imY[ymin:ymax,xmin:xmax,zmin:zmax].flatten()                        # get 3x3x3 neighborhood of filament image
-        lgt=imL[ymin:ymax,xmin:xmax,zmin:zmax].flatten()
-        stg=imS[ymin:ymax,xmin:xmax,zmin:zmax].flatten()
-        for idx,i in enumerate(sec):                                            # check all pixels in 3x3x3 neighborhood...
-            if(i!=xy and i>1):                                                  # if the center and neighboring pixels have different labels...
-                u,v=np.sort([xy-2,i-2])                                         # sort nodes to avoid adding bidirectional edges (A->B and B->A)    
-                edist=sp.linalg.norm(pos[u]-pos[v])                             # compute Euklidean distance between the corresponding nodes
-                fdist=imL[y,x,z]+lgt[idx]                                       # compute sum of the two partial filament lengths
-                weight=imS[y,x,z]+stg[idx]                                      # compute sum of the two partial filament intensities
-                weight=max(1e-9,weight)                                         # set minimum edge weight
-                capa=1.0*weight/fdist                                           # compute edge capacity as ration of filament weight and length
-                lgth=1.0*fdist/weight                                           # compute edge length as inverse capacity
-                conn=0                                                          # set edge connectivity variable indicating that edge belongs to original, non-connected network
-                jump=0                                                          # set edge jump variable indicating that edge belongs to original, non-periodic network
-                graph.add_edge(u,v,edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump) # add edge to network      
+    if(not isinstance(imE,tuple)):                                              # if dense image...
+        imE=utils.skeleton_sparse(imE)                                          # convert to sparse skeleton
+    crd,nbrs,labs,shape=imE
+    N=labs.max()-1                                                              # number of nodes
+    pos=crd[labs>1][:,[1,0,2]].astype('int')                                    # node positions (x,y,z)
+    offs,adjs=utils.node_offsets()                                              # get neighbor offsets in raster order of 3x3x3 neighborhood
+    shft=np.array(list(itertools.product([0,1],repeat=3)))                      # neighborhoods are cropped at the lower image borders, which shifts the distance matrix of the 3x3x3 neighborhood
+    diag=[np.sqrt(((offs-sh)**2).sum(1)).tolist() for sh in shft]               # distance to straight/diagonal/room diagonal neighbors for each shift
+    diac=np.sqrt((shft**2).sum(1)).tolist()                                     # distance to center pixel for each shift
+    ys,xs,zs=crd.T                                                              # get filament and node pixels in raster order
+    shfs=(4*(ys==0)+2*(xs==0)+1*(zs==0)).tolist()                               # get shift of each pixel
+    r,k=np.nonzero(nbrs>=0)                                                     # get neighboring filament pixels of each pixel as flat lists
+    ptrs=np.searchsorted(r,np.arange(len(labs)+1)).tolist()
+    nbrk=k.tolist()
+    nbrq=nbrs[r,k].tolist()
+    labs=labs.tolist()                                                          # list to propagate nodes
+    lgts=[1.0]*len(labs)                                                        # list to remember summed length of filament up to current position
+    stgs=[1.0]*len(labs)                                                        # list to remember summed intensity of filament up to current position 
+    ints=imG[ys,xs,zs].tolist()                                                 # intensities of filament pixels
+    front=[p for p,l in enumerate(labs) if l>1]                                 # start frontier at node pixels (>1)
+    fs=labs.count(1)                                                            # get pixels which are neither background (=0), nor nodes (>1), but filament (=1)
+    while(fs>0 and len(front)>0):                                               # while there is still "filament" that can be reached from the frontier...
+        grow=[]
+        hold=[]
+        for p in front:                                                         # for each frontier pixel in raster order...
+            lab,lgt,stg,its,dg=labs[p],lgts[p],stgs[p],ints[p],diag[shfs[p]]
+            if(lgt==1):                                                         # increase length and intensity of pixel itself if not set yet
+                lgts[p]=diac[shfs[p]]+lgt
+            if(stg==1):
+                stgs[p]=its+stg
+            for j in range(ptrs[p],ptrs[p+1]):                                  # for each neighboring pixel...
+                k,q=nbrk[j],nbrq[j]
+                if(labs[q]==1):                                                 # if neighbor is unlabeled filament set it to this node index
+                    labs[q]=lab
+                    grow.append(q)
+                if(lgts[q]==1):                                                 # if neighbor length is not set yet, increase it by 1/sqrt(2)/sqrt(3) for straight/diagonal/room diagonal pixels
+                    lgts[q]=dg[k]+lgt
+                if(stgs[q]==1):                                                 # if neighbor intensity is not set yet, increase it by intensity of the original image
+                    stgs[q]=its+stg
+            if(any(lgts[q]==1 or stgs[q]==1 for q in nbrq[ptrs[p]:ptrs[p+1]])): # keep pixel in frontier if neighbor length or intensity is still not set (zero distance at image borders)
+                hold.append(p)
+        fs-=len(grow)                                                           # compute remaining amount of filament
+        front=sorted(grow+hold)                                                 # continue with newly labeled and held pixels in raster order
+    labs,lgts,stgs=np.array(labs),np.array(lgts),np.array(stgs)
+    p,k=np.nonzero(nbrs>=0)                                                     # get all pairs of neighboring pixels in raster order
+    q=nbrs[p,k]
+    idx=(labs[p]>1)*(labs[q]>1)*(labs[p]!=labs[q])                              # keep pairs of pixels with different node labels
+    p,q=p[idx],q[idx]
+    edges=np.zeros(len(p),dtype=[('src','int32'),('dst','int32')]+[(key,'float64') for key in ['edist','fdist','weight','capa','lgth','conn','jump']])
+    edges['src']=np.minimum(labs[p],labs[q])-2                                  # sort nodes to avoid adding bidirectional edges (A->B and B->A)    
+    edges['dst']=np.maximum(labs[p],labs[q])-2
+    edges['edist']=np.sqrt(((1.0*pos[edges['src']]-pos[edges['dst']])**2).sum(1)) # compute Euklidean distance between the corresponding nodes
+    edges['fdist']=lgts[p]+lgts[q]                                              # compute sum of the two partial filament lengths
+    edges['weight']=np.maximum(1e-9,stgs[p]+stgs[q])                            # compute sum of the two partial filament intensities with minimum edge weight
+    edges['capa']=1.0*edges['weight']/edges['fdist']                            # compute edge capacity as ration of filament weight and length
+    edges['lgth']=1.0*edges['fdist']/edges['weight']                            # compute edge length as inverse capacity
+    edges['conn']=0                                                             # set edge connectivity variable indicating that edge belongs to original, non-connected network
+    edges['jump']=0                                                             # set edge jump variable indicating that edge belongs to original, non-periodic network
+    graph=utils.table_graph(edges,N,multi=1)                                    # create multi graph from edge table
+    if(table):
+        return graph,pos,edges
     return graph,pos
 
-def unify_graph(graph):
+def unify_table(table):
+    """Project edge table of multigraph to edge table of simple graph.
+
+    Parameters
+    ----------
+    table : structured array of edges (see edge_table) with capacities and lengths
+    
+    Returns
+    -------
+    tablez : structured array of unique edges in order of first occurrence with summed capacities, minimum lengths, and multiplicities
+
+    """
+    names=[n for n in table.dtype.names if n!='multi']
+    if(len(table)==0):                                                          # graph without edges
+        return np.zeros(0,dtype=[(n,table.dtype[n]) for n in names]+[('multi','float64')])
+    u=np.minimum(table['src'],table['dst'])
+    v=np.maximum(table['src'],table['dst'])
+    isort=np.lexsort((v,u))                                                     # group parallel edges keeping their original order
+    u,v=u[isort],v[isort]
+    starts=np.flatnonzero(np.hstack([True,(u[1:]!=u[:-1])+(v[1:]!=v[:-1])]))    # get first edge of each group
+    group=np.zeros(len(isort),dtype='int')
+    group[isort]=np.cumsum(np.hstack([False,(u[1:]!=u[:-1])+(v[1:]!=v[:-1])]))  # get group of each edge in original order
+    tablez=np.zeros(len(starts),dtype=[(n,table.dtype[n]) for n in names]+[('multi','float64')])
+    for n in names:                                                             # keep properties of first edge
+        tablez[n]=table[n][isort[starts]]
+    tablez['capa']=np.bincount(group,table['capa'],len(starts))                 # compute sum of edge capacities in original order
+    tablez['lgth']=np.minimum.reduceat(table['lgth'][isort],starts)             # compute minimum of edge lengths
+    tablez['multi']=np.diff(np.hstack([starts,len(isort)]))                     # compute edge multiplicities
+    tablez=tablez[np.argsort(isort[starts],kind='mergesort')]                   # sort edges by first occurrence
+    return tablez
+
+def unify_graph(graph,table=None):
     """Project multigraph to simple graph.
 
     Parameters
     ----------
     graph : original graph
+    table : edge table of graph (None = convert graph)
     
     Returns
     -------
     graphz : simple graph
 
     """    
-    graphz=nx.empty_graph(graph.number_of_nodes())                              # construct new empty graph with the same number of nodes
-    for u,v,d in graph.edges(data=True):                                        # for each edge in the multigraph...     
-        edist=d['edist']                                                        # get edge properties
-        fdist=d['fdist']
-        weight=d['weight']
-        capa=d['capa']
-        lgth=d['lgth']
-        conn=d['conn']
-        jump=d['jump']
-        multi=1                                                                 # set edge multiplicity to one
-        if graphz.has_edge(u,v):                                                # if simple graph already contains the edge in question...   
-            graphz[u][v]['multi']+=1.0                                          # increase edge multiplicity by one
-            graphz[u][v]['capa']+=capa                                          # compute sum of edge capacities
-            if(graphz[u][v]['lgth']>lgth):                                      # compute minimum of edge lengths
-                graphz[u][v]['lgth']=lgth
-        else:
-            graphz.add_edge(u,v,edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump,multi=multi) # add edge to simple graph otherwise  
+    if(table is None):
+        table=utils.edge_table(graph,['edist','fdist','weight','capa','lgth','conn','jump']) # get edge properties
+    table=utils.unify_table(table)                                              # sum capacities, take minimum lengths, and count multiplicities of parallel edges
+    graphz=utils.table_graph(table,graph.number_of_nodes())                     # construct simple graph with the same number of nodes
     return graphz
     
 def connect_graph(graph,pos,imG):
@@ -537,18 +1538,44 @@ def connect_graph(graph,pos,imG):
     graphz : connect graph
 
     """    
-    dists=sp.spatial.distance_matrix(pos,pos)                                   # compute distance matrix between all node positions
     graphz=graph.copy()                                                         # copy original graph    
     N=graphz.number_of_nodes()                                                  # get number of nodes                            
-    comp=nx.connected_components(graphz)                                        # compute connected components
-    comp=sorted(comp,key=len)[::-1]                                             # sort connected components in descending order according to size
-    while len(comp)>1:                                                          # while network is disconnected... 
-        compo=comp[0]                                                           # get nodes in largest component
-        compl=list(compo)
-        compi=list(set(range(N)).difference(compo))                             # get remaining nodes
-        dist=dists[compl][:,compi]                                              # get distance matrix between nodes of largest component and remaining network
-        n0,ni=np.unravel_index(dist.argmin(),dist.shape)                        # find pair of nodes with minimum distance    
-        p0,pi=pos[compl][n0],pos[compi][ni] 
+    table=utils.edge_table(graphz,[])
+    C,labels=sp.sparse.csgraph.connected_components(sp.sparse.coo_matrix((np.ones(len(table)),(table['src'],table['dst'])),shape=(N,N)),directed=False) # compute connected components
+    sizes=np.bincount(labels)
+    main=np.where(sizes==sizes.max())[0][-1]                                    # get largest component (last one in node order if sizes are equal)
+    isort=np.argsort(labels,kind='mergesort')                                   # get nodes of each component
+    members=np.split(isort,np.cumsum(sizes)[:-1])
+    inmain=(labels==main)
+    tree=[None,None]                                                            # KD-tree of nodes outside largest component and their indices
+    def rebuild():
+        idx=np.where(~inmain)[0]
+        tree[:]=[sp.spatial.cKDTree(pos[idx]),idx]
+    def nearest(m):                                                             # find nearest node outside largest component (smallest index if distances are equal)
+        ftree,idx=tree                                                          # and return distance, node of largest component, and outside node
+        k=min(8,len(idx))
+        while(True):
+            d,j=ftree.query(pos[m],k)
+            d,j=np.atleast_1d(d),np.atleast_1d(j)
+            out=~inmain[idx[j]]
+            if(out.any() and (d[-1]>d[out].min() or k==len(idx))):
+                dmin=d[out].min()
+                return dmin,m,idx[j][out*(d==dmin)].min()
+            if(k==len(idx)):
+                return None
+            k=min(2*k,len(idx))
+    heap=[]                                                                     # nearest outside node for each node of largest component
+    if(C>1):
+        rebuild()
+        for m in members[main]:
+            heapq.heappush(heap,nearest(m))
+    merged=1
+    while(merged<C):                                                            # while network is disconnected... 
+        dmin,n0,ni=heapq.heappop(heap)                                          # find pair of nodes with minimum distance    
+        if(inmain[ni]):                                                         # update outdated nearest node
+            heapq.heappush(heap,nearest(n0))
+            continue
+        p0,pi=pos[n0],pos[ni] 
         edist=sp.linalg.norm(p0-pi)                                             # compute distance between nodes                   
         edist=max(1.0,edist)                                                    # set minimum distance between nodes        
         fdist=1.0*np.ceil(edist)                                                # approximate filament length by rounding node distance
@@ -562,12 +1589,19 @@ def connect_graph(graph,pos,imG):
         conn=1                                                                  # set edge connectivity variable indicating that edge belongs to new, connected network
         jump=0                                                                  # set edge jump variable indicating that edge belongs to original, non-periodic network
         multi=1                                                                 # set edge mutiplicity variable
-        graphz.add_edge(compi[ni],compl[n0],edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump,multi=multi) # add edge to network       
-        comp=nx.connected_components(graphz)                                    # compute connected components
-        comp=sorted(comp,key=len)[::-1]                                         # sort connected components in descending order according to size
+        graphz.add_edge(ni,n0,edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump,multi=multi) # add edge to network       
+        merged+=1
+        comp=members[labels[ni]]                                                # merge connected component into largest component
+        inmain[comp]=True
+        if(merged==C):
+            break
+        if(2*np.sum(~inmain)<len(tree[1])):                                     # rebuild KD-tree once half of its nodes were merged
+            rebuild()
+        for m in np.append(comp,n0):
+            heapq.heappush(heap,nearest(m))
     return graphz
 
-def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000):            
+def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000,rng=None):            
     """Randomize graph by shuffling node positions and edges or edge capacities only.
 
     Parameters
@@ -578,6 +1612,7 @@ def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000):
     planar : ignore edge crossings (=0) or favor planar graph by reducing number of edge crossings (=1)
     weights : shuffle only edge capacities (=0) or node positions and edges (=1)
     iterations : number of iterations before returning original graph
+    rng : random number generator (numpy RandomState; None = global random state)
     
     Returns
     -------
@@ -585,9 +1620,13 @@ def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000):
     poz : randomized node positions
 
     """    
+    if(rng is None):                                                            # use global random state or derive Python random state from generator
+        rand=random
+    else:
+        rand=random.Random(rng.randint(2**31))
     if(weights==0):                                                             # if shuffling of edge capacities only...     
         ec=np.array([d for u,v,d in graph.edges(data=True)])                    # get edge properties         
-        random.shuffle(ec)                                                      # shuffle edge capacities
+        rand.shuffle(ec)                                                        # shuffle edge capacities
         graphz=graph.copy()                                                     # copy graph
         for j,(u,v,d) in enumerate(graphz.edges(data=True)):                    # for each edge...
             for k in d.keys():                                                  # copy shuffled edge properties
@@ -597,52 +1636,56 @@ def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000):
         N=graph.number_of_nodes()                                               # get node number
         E=graph.number_of_edges()                                               # get edge number
         graphz=nx.empty_graph(N,nx.MultiGraph())                                # create new, empty multigraph        
-        diste=np.array([d['edist'] for u,v,d in graph.edges(data=True)])        # get Euclidean edge lengths   
+        table=utils.edge_table(graph,['edist','weight','capa'])
+        diste=table['edist']                                                    # get Euclidean edge lengths   
         bins=[0,10,20,30,40,50,60,70,80,90,100,110,120,130,140,150,160,170,180,190,200,9999] # set bin boundaries for edge lengths
         B=len(bins)-1                                                           # get number of bins
         dibse=np.zeros(E).astype('int')                                         # create array for assigning bin numbers to edges
         for i,(b1,b2) in enumerate(zip(bins[:-1],bins[1:])):                    # for each bin...
             ide=(diste>=b1)*(diste<b2)                                          # get edges with Euclidean lengths in the given bin
             dibse[ide]=i                                                        # assign bin number to edges        
-        eweight=np.array([d['weight'] for u,v,d in graph.edges(data=True)])     # get edge weights    
-        ecapa=np.array([d['capa'] for u,v,d in graph.edges(data=True)])         # get edge capacities   
+        eweight=table['weight']                                                 # get edge weights    
+        ecapa=table['capa']                                                     # get edge capacities   
         redo=1                                                                  # variable indicating that no suitable randomization was obtained yet                                                                      
         iteration=0                                                             # number of iterations
         while(redo==1 and iteration<iterations):                                # while neither a suitable randomization nor the number of allowed iterations were reached yet...
             iteration+=1                                                        # increase iteration by one
-            poz=utils.cell_sample(mask,N)[:,::-1].astype('int') # shuffle xy-components of node positions 
+            poz=utils.cell_sample(mask,N,rng)[:,::-1].astype('int')             # shuffle xy-components of node positions 
             zzz=pos[:,2]                                                        # keep z-component of node positions
             poz=np.vstack([poz.T,zzz]).T                                        # merge xyz-components of node positions            
-            dista=scipy.spatial.distance_matrix(poz,poz)                        # compute distance matrix between new node positions
-            dibsa=np.zeros((N,N)).astype('int')                                 # assign bin numbers to all new, potential edges
-            for i,(b1,b2) in enumerate(zip(bins[:-1],bins[1:])):        
-                ida=(dista>=b1)*(dista<b2)
-                dibsa[ida]=i      
-            dibsa[np.tri(N)>0]=-9999                                            # set lower part of the bin number matrix to negativ number to exclude loops (A->A) and bidirectional edges (A->B and B->A)
-            redo=1*np.max([(dibsa==b).sum()<(dibse==b).sum() for b in range(B)]) # check that each original edge can be accommodated given the new node positions 
+            pairs,dists=utils.pair_index(poz,bins,max(dibse.tolist()+[0])+1)    # index candidate pairs of new nodes by distance bin up to the longest original edge
+            redo=1*np.max([len(pairs[b])<(dibse==b).sum() for b in range(len(pairs))]) # check that each original edge can be accommodated given the new node positions 
         if(iteration<iterations):                                               # if the number of allowed iterations was not reached yet...
             isort=np.argsort(diste)[::-1]                                       # sort bin assignments, edge weights, and edge capacities by Euclidean length
             diste=diste[isort]
             dibse=dibse[isort]    
             eweight=eweight[isort]    
             ecapa=ecapa[isort]       
-            edges=[]                                                            # list of added edges       
+            avail=[len(pr) for pr in pairs]                                     # number of remaining candidate pairs per bin
+            edges=np.zeros((E,2,2))                                             # array of added edges
+            grid={}                                                             # grid index of added edges
+            cell=max(10.0,np.median(diste))                                     # set grid cell size to typical edge length
             for e in range(E):                                                  # for each edge...
-                candidates=np.where(dibsa==dibse[e])                            # get candidate pairs of new nodes whose distance matches the Euclidean length of the selected edge 
-                C=len(candidates[0])                                            # get number of candidate pairs           
+                b=dibse[e]                                                      # get candidate pairs of new nodes whose distance matches the Euclidean length of the selected edge 
+                pr,dp=pairs[b],dists[b]
+                C=avail[b]                                                      # get number of candidate pairs           
                 cromm=9999                                                      # dummy variable for number of edge crossings
-                ii=random.sample(range(C),min(50,C))                            # select up to 50 candidate pairs        
+                ii=rand.sample(range(C),min(50,C))                              # select up to 50 candidate pairs        
                 for i in ii:                                                    # for each candidate pair...  
-                    n1=candidates[0][i]                                         # get nodes
-                    n2=candidates[1][i]            
+                    n1,n2=pr[i]                                                 # get nodes
                     edge=np.array([[poz[n1][0],poz[n2][0]],[poz[n1][1],poz[n2][1]]]).T # create line segment between candidate nodes      
-                    cross=planar*utils.multi_line_intersect(np.array(edge),np.array(edges)).sum() # compute number of line segment crossings with existing edges 
-                    if(cross<cromm and dibsa[n1,n2]>=0):                        # if edge is allowed and number of crossings is smaller than for previous candidates...
+                    cross=0
+                    if(planar):                                                 # compute number of line segment crossings with nearby existing edges 
+                        idx=utils.segment_query(grid,edge,cell)
+                        cross=utils.multi_line_intersect(edge,edges[idx]).sum()
+                    if(cross<cromm):                                            # if number of crossings is smaller than for previous candidates...
                         cromm=cross                                             # store crossing number 
                         edgem=edge                                              # store edge
                         m1,m2=n1,n2                                             # store nodes
-                edges.append(edgem)                                             # add edge to list of edges
-                edist=dista[m1,m2]                                              # set Euclidean distance
+                        im=i                                                    # store candidate index
+                edges[e]=edgem                                                  # add edge to array and grid index of edges
+                utils.segment_insert(grid,edgem,e,cell)
+                edist=dp[im]                                                    # set Euclidean distance
                 fdist=1.0*np.ceil(edist)                                        # approximate filament length by rounding node distance
                 weight=eweight[e]                                               # set edge weight
                 capa=ecapa[e]                                                   # set edge capacity
@@ -651,13 +1694,15 @@ def randomize_graph(graph,pos,mask,planar=0,weights=0,iterations=1000):
                 jump=0                                                          # set edge jump variable indicating that edge belongs to randomized, non-periodic network
                 multi=1                                                         # set edge mutiplicity variable
                 graphz.add_edge(m1,m2,edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump,multi=multi) # add edge to network
-                dibsa[m1,m2]=-9999                                              # remove edge from allowed edges
-                dibsa[m2,m1]=-9999
+                C-=1                                                            # remove edge from allowed edges by swapping it behind the remaining candidates
+                pr[[im,C]]=pr[[C,im]]
+                dp[[im,C]]=dp[[C,im]]
+                avail[b]=C
         else:
             graphz,poz=graph,pos                                                # copy original network and node positions otherwise
     return graphz,poz
              
-def centralize_graph(graph,epb='lgth',efb='capa',ndg='capa',nec='capa',npr='capa'): 
+def centralize_graph(graph,epb='lgth',efb='capa',ndg='capa',nec='capa',npr='capa',samples=0,table=None): 
     """Compute edge centralities.
 
     Parameters
@@ -668,122 +1713,97 @@ def centralize_graph(graph,epb='lgth',efb='capa',ndg='capa',nec='capa',npr='capa
     ndg : "                                          degree centrality
     nec : "                                          eigenvector centrality
     npr : "                                          page rank
+    samples : number of sampled source nodes for approximate flow betweenness (0 = exact)
+    table : edge table of graph with the above edge properties (None = convert graph once)
     
     Returns
     -------
-    graphz : graph with computed edge centralities  
+    graphz : graph with computed edge centralities and error bound of approximate flow betweenness as graph property efb_err (0 = exact)
 
     """    
     graphz=graph.copy()                                                         # copy graph  
-    edges=graphz.edges(data=True)                                               # get edge capacities
-    ec=1.0*np.array([d['capa'] for u,v,d in edges])  
-    ec/=ec.sum()                                                                # normalize edge capacities
+    if(table is None):                                                          # get edge properties once for all centralities
+        table=utils.edge_table(graphz,sorted(set(['capa','lgth',efb,ndg])))
+    else:
+        table=table.copy()
+    ec=table['capa']/table['capa'].sum()                                        # normalize edge capacities
     el=1.0/ec
-    for i,(u,v,d) in enumerate(edges):                                          # update edge capacities and lengths
-        d['capa']=ec[i]
-        d['lgth']=el[i]                 
+    table['capa'],table['lgth']=ec,el
+    utils.edge_write(graphz,{'capa':ec,'lgth':el})                              # update edge capacities and lengths
     epb=nx.edge_betweenness_centrality(graphz,weight=epb)                       # compute edge path betweenness
-    efb=nx.edge_current_flow_betweenness_centrality(graphz,weight=efb)          # compute edge flow betweenness  
-    lineg=nx.line_graph(graphz)                                                 # compute line graph
-    degree=graphz.degree(weight=ndg)                                            # get capacity weighted edge degree
-    for u,v,d in lineg.edges(data=True):                                        # set edge capacity of linegraph to node degree of original graph
-        n=list(set(u).intersection(v))[0]        
-        d[ndg]=degree[n]                     
-    nec=nx.eigenvector_centrality_numpy(lineg,weight=ndg) # compute edge degree, eigenvector, and page rank centrality
-    npr=nx.pagerank(lineg,weight=ndg)    
-    ndg=lineg.degree(weight=ndg)    
-    for i,(u,v,d) in enumerate(edges):                                          # set edge centralities
-        e=(u,v) 
-        if(e in epb.keys()):
-            d['epb']=epb[e]
-        else:
-            d['epb']=epb[e[::-1]]
-        if(e in efb.keys()):
-            d['efb']=efb[e]
-        else:
-            d['efb']=efb[e[::-1]]
-        if(e in ndg.keys()):
-            d['ndg']=ndg[e]
-        else:
-            d['ndg']=ndg[e[::-1]]  
-        if(e in nec.keys()):
-            d['nec']=nec[e]
-        else:
-            d['nec']=nec[e[::-1]]               
-        if(e in npr.keys()):
-            d['npr']=npr[e]
-        else:
-            d['npr']=npr[e[::-1]]           
+    epb=np.array([epb[e] if e in epb else epb[e[::-1]] for e in graphz.edges()])
+    efb,err=utils.flow_betweenness(graphz,weight=efb,samples=samples,table=table) # compute edge flow betweenness  
+    ndg,nec,npr=utils.edge_centralities(graphz,weight=ndg,table=table)          # compute edge degree, eigenvector, and page rank centrality of line graph
+    utils.edge_write(graphz,{'epb':epb,'efb':efb,'ndg':ndg,'nec':nec,'npr':npr}) # set edge centralities
+    graphz.graph['efb_err']=err                                                 # keep error bound of flow betweenness
     return graphz    
 
-def normalize_graph(graph):    
+def normalize_graph(graph,table=None):    
     """Normalize edge properties.
 
     Parameters
     ----------
     graph : original graph
+    table : edge table of graph with capacities and edge centralities (None = convert graph)
     
     Returns
     -------
     graph : graph with normalized edge properties
 
     """    
-    ec=1.0*np.array([d['capa'] for u,v,d in graph.edges(data=True)])
-    ec/=ec.sum()
+    if(table is None):
+        table=utils.edge_table(graph,['capa','epb','efb','ndg','nec','npr'])
+    ec=table['capa']/table['capa'].sum()
     el=1.0/ec
     el/=el.sum()
-    epb=1.0*np.array([d['epb'] for u,v,d in graph.edges(data=True)])
-    epb/=epb.sum()
-    efb=1.0*np.array([d['efb'] for u,v,d in graph.edges(data=True)])
-    efb/=efb.sum()
-    ndg=1.0*np.array([d['ndg'] for u,v,d in graph.edges(data=True)])
-    ndg/=ndg.sum()
-    nec=1.0*np.array([d['nec'] for u,v,d in graph.edges(data=True)])
-    nec/=nec.sum()    
-    npr=1.0*np.array([d['npr'] for u,v,d in graph.edges(data=True)])
-    npr/=npr.sum()
-    for i,(u,v,d) in enumerate(graph.edges(data=True)):
-        d['capa']=ec[i]
-        d['lgth']=el[i]
-        d['epb']=epb[i]
-        d['efb']=efb[i]
-        d['ndg']=ndg[i]
-        d['nec']=nec[i]        
-        d['npr']=npr[i]
+    columns={'capa':ec,'lgth':el}
+    for k in ['epb','efb','ndg','nec','npr']:                                   # normalize edge centralities
+        columns[k]=table[k]/table[k].sum()
+    utils.edge_write(graph,columns)
     return graph
 
-def boundary_graph(jnet,graph,pos,SP,SL,JV,JH,imG,dthres=10.0,jthres=2.5):
+def boundary_graph(jnet,graph,pos,SP,SL,JV,JH,imG,dthres=10.0,jthres=2.5,src=None):
     """Generate graph with periodic boundary conditions.
 
     Parameters
     ----------
-    jnet : jump network
+    jnet : jump network (see pbc_jnet_interior)
     graph : original graph
     pos : node positions
-    SP : shortest paths
+    SP : predecessors on shortest paths (see jump_paths)
     SL : shortest path lengths
     JV : number of vertical jumps along shortest path
     JH : number of horizontal jumps along shortest path
     imG : Gaussian filtered image of filament structures
+    dthres : maximum length of shortest paths between connected nodes
+    jthres : maximum number of jumps along shortest paths between connected nodes
+    src : nodes of jump network corresponding to rows of SP, SL, JV, JH (None = all nodes)
     
     Returns
     -------
     graphz : graph with periodic boundary conditions
 
     """   
-    B=jnet.number_of_nodes()                                                    # get number of nodes of jump network
-    C=np.tril((SL<dthres)*((JV+JH)>0)*((JV+JH)<jthres))[B:,B:]                  # get pairs of nodes in jump network that are less than dthres apart and that are connected by at least/most 0/jthres  
+    N=len(pos)
+    B=jnet.number_of_nodes()-N                                                  # get number of border nodes of jump network
+    if(src is None):
+        src=np.arange(B+N)
+    rows=np.flatnonzero(np.array(src)>=B)                                       # get rows of nodes of original network
+    C=((SL<dthres)*((JV+JH)>0)*((JV+JH)<jthres))[rows][:,B:]                    # get pairs of nodes in jump network that are less than dthres apart and that are connected by at least/most 0/jthres  
+    C*=np.arange(N)[None,:]<=(np.array(src)[rows]-B)[:,None]                    # keep each pair only once
     wh=np.array(np.where(C)).T                                                  
+    jpos=np.round(jnet.graph['pos']).astype('int')                              # get positions of nodes of jump network
     graphz=nx.MultiGraph(graph.copy())                                          # create new, empty multigraph
-    for idx,(w1,w2) in enumerate(wh):                                           # for each pair of nodes, i.e., each potential edge...
-        path=SP[B+w1][B+w2]                                                     # get shortest path between selected nodes
+    for idx,(r,w2) in enumerate(wh):                                            # for each pair of nodes, i.e., each potential edge...
+        w1=src[rows[r]]-B
+        path=utils.jump_path(SP,JV,JH,rows[r],B+w2)                             # get shortest path between selected nodes
         pairs=zip(path[0:],path[1:])
         weight=0.0
         for n0,n1 in pairs:                                                     # for each edge along path...
             if(jnet[n0][n1]['jump']==0):                                        # if it is not a jump edge...
-                rr,cc=skimage.draw.line(pos[n0][1],pos[n0][0],pos[n1][1],pos[n1][0]) # draw line along edge
-                weight+=imG[cc,rr].sum()                                        # add edge weight as sum of intensities in the underlying image along the line
-        edist=SL[B+w1,B+w2]                                                     # set edge Euclidean length
+                rr,cc=skimage.draw.line(jpos[n0][1],jpos[n0][0],jpos[n1][1],jpos[n1][0]) # draw line along edge
+                weight+=imG[rr,cc].sum()                                        # add edge weight as sum of intensities in the underlying image along the line
+        edist=SL[rows[r],B+w2]                                                  # set edge Euclidean length
         edist=max(1.0,edist)
         fdist=1.0*np.ceil(edist)                                                # approximate filament arc length
         weight=max(1e-9,weight)
@@ -795,7 +1815,7 @@ def boundary_graph(jnet,graph,pos,SP,SL,JV,JH,imG,dthres=10.0,jthres=2.5):
         graphz.add_edge(w2,w1,edist=edist,fdist=fdist,weight=weight,capa=capa,lgth=lgth,conn=conn,jump=jump,multi=multi) # add edge   
     return graphz
                                                   
-def compute_graph(graph,pos,mask):  
+def compute_graph(graph,pos,mask,paths=0,tol=0.05,rng=None,table=None):  
     """Compute graph properties.
 
     Parameters
@@ -803,24 +1823,32 @@ def compute_graph(graph,pos,mask):
     graph : original graph
     pos : node positions
     mask : binary array of cellular region of interest
+    paths : compute path length statistics exactly (=0) or estimate them from source nodes sampled uniformly (=1) or stratified by connected component (=2)
+    tol : relative width of confidence intervals at which sampling of path lengths stops
+    rng : random number generator for sampling of path lengths (numpy RandomState; None = global random state)
+    table : edge table of graph with capacities and lengths (None = convert graph once)
     
     Returns
     -------
-    quanta : list of graph properties
+    quanta : list of graph properties, followed by confidence intervals of average and CV of path lengths and number of sampled source nodes if paths>0
 
     """            
     N=graph.number_of_nodes()                                                   # number of nodes
     E=graph.number_of_edges()                                                   # number of edges
-    ca=utils.connected_components(graph)                                # compute sizes of connected components
+    if(table is None):                                                          # get edge properties once for all graph properties
+        table=utils.edge_table(graph,['capa','lgth'])
+    ca=utils.connected_components(graph,table)                                  # compute sizes of connected components
     C=len(ca)                                                                   # number of connected components    
-    ec=1.0*np.array([d['capa'] for u,v,d in graph.edges(data=True)])            # get edge capacities
+    ec=table['capa']                                                            # get edge capacities
     bund=np.nanmean(ec)                                                         # compute average edge capacity ('bundling')    
     assort=nx.degree_pearson_correlation_coefficient(graph,weight='capa')       # compute assortativity ('heterogeneity')               
-    dist=utils.path_lengths(graph)                                      # compute shortest path lengths  
-    distMU=np.nanmean(dist)                                                     # compute average path length ('reachability')
-    distSD=np.nanstd(dist)                                                      # compute standard deviation of path lengths   
-    distCV=1.0*distSD/distMU                                                    # compute coefficient of variation of path lengths ('disperal')  
-    ac=np.sort(nx.laplacian_spectrum(graph,weight='capa'))[1]                   # compute algebraic connectivity ('robustness')    
+    A=utils.graph_matrix(graph,'lgth','min',table)                              # convert graph once to sparse matrix of edge lengths
+    if(paths==0):                                                               # compute average path length ('reachability') and standard deviation of path lengths
+        distMU,distSD=utils.path_stats(graph,A=A)
+        distCV=1.0*distSD/distMU                                                # compute coefficient of variation of path lengths ('disperal')  
+    else:                                                                       # or estimate them from sampled source nodes
+        distMU,distCV,ciMU,ciCV,K=utils.path_sample(graph,tol=tol,strata=paths-1,rng=rng,A=A)
+    ac=utils.algebraic_connectivity(graph,A=utils.graph_matrix(graph,'capa','sum',table)) # compute algebraic connectivity ('robustness')    
     degs=utils.edge_angles(graph,pos[:,:2],mask)                        # compute edge angles relative to cell axis
     angleMU=np.nanmean(degs)                                                    # compute average angle
     angleSD=np.nanstd(degs)                                                     # compute standard deviation of angles
@@ -829,902 +1857,783 @@ def compute_graph(graph,pos,mask):
     crossing=np.nanmean(cns)                                                    # compute average crossing number    
     quants=['# nodes','# edges','# connected components','avg. edge capacity','assortativity','avg. path length','CV path length','algebraic connectivity','CV edge angles','crossing number'] # list of graph property names
     quanta=[N,E,C,bund,assort,distMU,distCV,ac,angleCV,crossing]                # list of graph properties
+    if(paths>0):                                                                # add accuracy of sampled path length statistics
+        quants+=['avg. path length CI low','avg. path length CI high','CV path length CI low','CV path length CI high','# sampled source nodes']
+        quanta+=[ciMU[0],ciMU[1],ciCV[0],ciCV[1],K]
     return quanta
 
-#%%############################################################################# periodic functions
+#%%############################################################################# graph store functions
 
-def mask2rot(mask):
-    """Compute main axis of cellular region of interest.
+def store_write(name,dataB,dataR=None,mode='w'):
+    """Write graphs and node positions of image series to one compressed container.
 
     Parameters
     ----------
-    mask : binary array of cellular region of interest
+    name : name and directory of container (.npz)
+    dataB : list of frame index, graph, node positions, ... for each frame (see extract_series)
+    dataR : list of frame index, randomized graph, node positions, ... for each frame and replicate (see extract_series), replicates are numbered in order after those already stored
+    mode : create new container (='w') or add graphs to existing container (='a'), biological networks of stored frames are rejected
     
     Returns
     -------
-    c0,c1 : coordinates along cell axis
-    vc,vd : center point and direction vector of cell axis
-    angle : angle between y-axis and main cell axis
-    rot : rotation matrix
+    keys : list of frame index and replicate of stored graphs (replicate 0 = biological network, 1,2,... = randomized networks)
 
-    """   
-    line=skimage.morphology.skeletonize(mask)                                   # skeletonize mask
-    co=np.array(np.where(line>0)).T[:,::-1]                                     # get coordinates of skeleton line
-    L=int(len(co)*0.2)                                                          # get points 20% and 80%  along the cell axis
-    c0=co[L]
-    c1=co[-L]
-    vc=co[int(len(co)*0.5)]                                                     # get center point and direction vector of cell axis
-    vd=c0-c1
-    angle=utils.angle360(vd)                                            # compute angle of cell axis
-    angli=angle*np.pi/180.0                                                     # convert angle to radian
-    rot=np.array([[np.cos(angli),-np.sin(angli)],[np.sin(angli),np.cos(angli)]]) # compute rotation matrix
-    return c0,c1,vc,vd,angle,rot
-   
-def mask2poly(mask):
-    """Convert cellular region of interest to polygon.
+    """
+    keys=[]
+    count={}
+    stored=set()
+    if(mode=='a' and os.path.isfile(name)):                                     # continue numbering of stored randomized networks
+        with zipfile.ZipFile(name,'r') as zf:
+            stored=set(tuple(int(x[1:]) for x in f.split('_')[:2]) for f in zf.namelist())
+        for frame,rep in stored:
+            count[frame]=max(count.get(frame,0),rep)
+    for d in dataB:
+        if((d[0],0) in stored):
+            raise ValueError('biological network of frame %d is already stored'%d[0])
+        stored.add((d[0],0))
+        keys.append((d[0],0,d[1],d[2]))
+    for d in (dataR or []):                                                     # number randomized networks of each frame consecutively
+        count[d[0]]=count.get(d[0],0)+1
+        keys.append((d[0],count[d[0]],d[1],d[2]))
+    with zipfile.ZipFile(name,mode,zipfile.ZIP_DEFLATED,allowZip64=True) as zf:
+        for frame,rep,graph,pos in keys:                                        # store node positions, edge table, and graph type as separate arrays
+            arrays={'pos':np.asarray(pos),'edges':utils.edge_table(graph),'info':np.array([graph.number_of_nodes(),graph.is_multigraph()],dtype='int64')}
+            for k,array in arrays.items():
+                buf=io.BytesIO()
+                np.lib.format.write_array(buf,array,allow_pickle=False)
+                zf.writestr('f%d_r%d_%s.npy'%(frame,rep,k),buf.getvalue())
+    return [(frame,rep) for frame,rep,graph,pos in keys]
+
+class GraphStore(object):
+    """Read-only container of graphs written by store_write that rebuilds graphs on access (edge properties are float64).
 
     Parameters
     ----------
-    mask : binary array of cellular region of interest
-    
-    Returns
-    -------
-    polya : original polygon
-    polyn : rotated polygon aligned with y-axis
+    name : name and directory of container (.npz)
 
-    """   
-    maski=sp.ndimage.minimum_filter(mask,3,mode='constant',cval=0)              # shrink mask 
-    polya=skimage.measure.find_contours(maski,0)[0]                             # find contours
-    polya=skimage.measure.approximate_polygon(polya,tolerance=0.0)              # approximate polygon
-    polya=1.0*remove_duplicates(polya)                                          # remove duplicate points
-    c0,c1,vc,vd,an,rot=mask2rot(maski)                                          # compute cell axis
-    polyn=np.dot(polya,rot)                                                     # rotate polygon
-    return polya[:,::-1],polyn[:,::-1]    
-  
-def pbc_jnet_border(polyn):    
-    """Compute border of jump network.
+    """
+    def __init__(self,name):
+        self.npz=np.load(name,allow_pickle=False)                               # arrays are only read when accessed
+        keys=set(tuple(int(x[1:]) for x in f.split('_')[:2]) for f in self.npz.files)
+        self.index=sorted(keys)
+
+    def keys(self):
+        return list(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self,key):
+        return tuple(key) in self.index
+
+    def __getitem__(self,key):
+        """Load graph and node positions of (frame, replicate)."""
+        prefix='f%d_r%d_'%tuple(key)
+        N,multi=self.npz[prefix+'info']
+        graph=utils.table_graph(self.npz[prefix+'edges'],int(N),multi=int(multi))
+        pos=self.npz[prefix+'pos']
+        return graph,pos
+
+    def close(self):
+        self.npz.close()
+
+#%%############################################################################# cache functions
+
+def cache_open(directory,size=2**30):
+    """Open on-disk cache of intermediate results of the extraction pipeline.
 
     Parameters
     ----------
-    polyn : rotated polygon of cellular region of interest
+    directory : directory of cache (created if missing)
+    size : maximum total size of cache in bytes, least recently used entries are evicted first
     
     Returns
     -------
-    graph : border of jump network
+    cache : tuple of directory and maximum size
 
-    """   
-    polyi=1.0*polyn.astype('int')                                               # convert coordinates to integers
-    polys=shapely.geometry.Polygon(polyi)                                       # convert polygon to shapely polygon
-    B=len(polyi)                                                                # get number of polygon points
-    graph=nx.empty_graph(B)                                                     # create new, empty graph 
-    for i in range(2):                                                          # for both x- and y-components...
-        bx=polyi[:,i]                                                           # get coordinate
-        for idx,x in enumerate(set(bx)):                                        # for each point
-            yy=np.sort(np.where(x==bx)[0])                                      # get other points with same coordinate
-            Y=len(yy)
-            for y in range(Y-1):                                                # for each other point with same coordinate
-                y1,y2=yy[y],yy[y+1]
-                line=shapely.geometry.LineString([polyi[y1],polyi[y2]])         # draw line between the two selected points
-                if(line.within(polys)):                                         # if the line is fully contained within the polygon...
-                    graph.add_edge(y1,y2,weight=0.0,jump=0.001**i)              # add the to network (jump=0.001/0.00001 lines parallel to along x/y-axis)
-    distb=sp.spatial.distance_matrix(polyn,polyn)                               # compute distance matrix between point of polygon
-    for b1 in range(B):                                                         # for each point along polygon
-        b2=np.mod(b1+1,B)
-        graph.add_edge(b1,b2,weight=distb[b1,b2],jump=0.0)                      # add edge no neighboring point
-    return graph                
+    """
+    if(not os.path.isdir(directory)):
+        os.makedirs(directory)
+    cache=(directory,size)
+    return cache
 
-def pbc_jnet_interior(pos,polya,jborder,cthres=10.0):
-    """Compute interier of jump network.
+def cache_key(*parts):
+    """Compute content-addressed key of cache entry.
 
     Parameters
     ----------
-    pos : node positions
-    polya : original polygon of cellular region of interest
-    jborder : border of jump network
-    cthres : maximum edge length between nodes of original network and border of jump network
+    parts : arrays, parameters, and keys of previous stages the entry depends on
     
     Returns
     -------
-    jnet : complete jump network
-    SP : array of shortest path lengths 
-    SL : array of jump sizes    
-    JV : get number of vertical jumps
-    JH : get number of horizonal jumps
+    key : hexadecimal SHA-1 hash
 
-    """          
-    jnet=jborder.copy()                                                         # copy border of jump network
-    B=jnet.number_of_nodes()                                                    # get number of nodes
-    distn=sp.spatial.distance_matrix(pos,polya)                                 # compute distances between node positions and border of jump network
-    for n in range(len(pos)):                                                   # for each node...
-        jnet.add_node(B+n)                                                      # add node to jump network
-        for e in np.where(distn[n]<cthres)[0]:                                  # add edge if node is close enough to border of jump network
-            jnet.add_edge(B+n,e,weight=distn[n,e],jump=0.0)
-    for n in range(len(pos)):                                                   # for each node...                                                  
-        if(jnet.degree(B+n)==0):                                                # add dummy edge to make network connected if node is disconnected
-            jnet.add_edge(B+n,0,weight=9999.0,jump=0.0)   
-    SP=utils.all_pairs_dijkstra_path(jnet,weight='weight',jump='jump') # compute all shortest path in jump network
-    SX=utils.all_pairs_dijkstra_path_length(jnet,weight='weight',jump='jump') # compute all shortest path lengths in jump network  
-    SL=1.0*np.array([[d1 for d1 in d2[0].values()] for d2 in SX.values()])      # array of shortest path lengths 
-    SJ=1.0*np.array([[d1 for d1 in d2[1].values()] for d2 in SX.values()])      # array of jump sizes    
-    JV=np.floor(SJ+0.5)                                                         # get number of vertical jumps
-    JH=np.floor(np.mod(SJ,1.0)*1000.0+0.5)                                      # get number of horizonal jumps
-    return jnet,SP,SL,JV,JH
-          
-#%%############################################################################# NetworkX: shortest path algorithms for weighed graphs
-
-# -*- coding: utf-8 -*-
-#"""
-#Shortest path algorithms for weighed graphs.
-#"""
-#__author__ = """\n""".join(['Aric Hagberg <hagberg@lanl.gov>',
-#                            'Loïc Séguin-C. <loicseguin@gmail.com>',
-#                            'Dan Schult <dschult@colgate.edu>'])
-##    Copyright (C) 2004-2011 by
-##    Aric Hagberg <hagberg@lanl.gov>
-##    Dan Schult <dschult@colgate.edu>
-##    Pieter Swart <swart@lanl.gov>
-##    All rights reserved.
-##    BSD license.
-#
-#__all__ = ['dijkstra_path',
-#           'dijkstra_path_length',
-#           'bidirectional_dijkstra',
-#           'single_source_dijkstra',
-#           'single_source_dijkstra_path',
-#           'single_source_dijkstra_path_length',
-#           'all_pairs_dijkstra_path',
-#           'all_pairs_dijkstra_path_length',
-#           'dijkstra_predecessor_and_distance',
-#           'bellman_ford','negative_edge_cycle']
-
-import heapq
-import networkx as nx
-from networkx.utils import generate_unique_node
+    """
+    sha=hashlib.sha1()
+    for part in parts:                                                          # hash data type, shape, and content of arrays and representation of parameters
+        if(isinstance(part,np.ndarray)):
+            part=np.ascontiguousarray(part)
+            sha.update(repr((part.dtype.str,part.shape)).encode())
+            sha.update(part.tobytes())
+        else:
+            sha.update(repr(part).encode())
+    return sha.hexdigest()
 
-def dijkstra_path(G, source, target, weight='weight',jump= 'jump'):
-    """Returns the shortest path from source to target in a weighted graph G.
+def cache_load(cache,key):
+    """Load entry from cache.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    source : node
-       Starting node
-
-    target : node
-       Ending node
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
+    cache : cache (see cache_open; None = no cache)
+    key : key of entry (see cache_key)
+    
     Returns
     -------
-    path : list
-       List of nodes in a shortest path.
-
-    Raises
-    ------
-    NetworkXNoPath
-       If no path exists between source and target.
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> print(nx.dijkstra_path(G,0,4))
-    [0, 1, 2, 3, 4]
+    data : dictionary of arrays, None if entry is missing
 
-    Notes
-    ------
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    See Also
-    --------
-    bidirectional_dijkstra()
     """
-    (length,path)=single_source_dijkstra(G, source, target=target,
-                                         weight=weight,jump=jump)
+    if(cache is None):
+        return None
+    name=os.path.join(cache[0],key+'.npz')
     try:
-        return path[target]
-    except KeyError:
-        raise nx.NetworkXNoPath("node %s not reachable from %s"%(source,target))
-
+        with np.load(name) as npz:
+            data=dict((k,npz[k]) for k in npz.files)
+        os.utime(name,None)                                                     # mark entry as recently used
+    except (IOError,OSError,ValueError):                                        # entry is missing, evicted, or broken
+        return None
+    return data
 
-def dijkstra_path_length(G, source, target, weight='weight',jump= 'jump'):
-    """Returns the shortest path length from source to target
-    in a weighted graph.
+def cache_save(cache,key,**arrays):
+    """Save entry to cache and evict least recently used entries.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    source : node label
-       starting node for path
-
-    target : node label
-       ending node for path
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
+    cache : cache (see cache_open; None = no cache)
+    key : key of entry (see cache_key)
+    arrays : arrays to store
+    
     Returns
     -------
-    length : number
-        Shortest path length.
-
-    Raises
-    ------
-    NetworkXNoPath
-        If no path exists between source and target.
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> print(nx.dijkstra_path_length(G,0,4))
-    4
-
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
+    None
 
-    See Also
-    --------
-    bidirectional_dijkstra()
     """
-    length=single_source_dijkstra_path_length(G, source, weight=weight,jump= jump)
+    if(cache is None):
+        return None
+    fd,temp=tempfile.mkstemp(dir=cache[0],suffix='.tmp')
     try:
-        return length[target]
-    except KeyError:
-        raise nx.NetworkXNoPath("node %s not reachable from %s"%(source,target))
-
-
-def single_source_dijkstra_path(G,source, cutoff=None, weight='weight',jump= 'jump'):
-    """Compute shortest path between source and all other reachable
-    nodes for a weighted graph.
+        with os.fdopen(fd,'wb') as f:                                           # write compressed arrays to temporary file
+            np.savez_compressed(f,**arrays)
+        utils.file_replace(temp,os.path.join(cache[0],key+'.npz'))              # replace entry at once so that concurrent workers never read partial files
+    except (IOError,OSError):                                                   # skip entry if another worker holds it open
+        if(os.path.exists(temp)):
+            os.remove(temp)
+    utils.cache_evict(cache)
+    return None
+
+def cache_evict(cache):
+    """Evict least recently used entries until cache fits its maximum size.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    source : node
-       Starting node for path.
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
-
+    cache : cache (see cache_open)
+    
     Returns
     -------
-    paths : dictionary
-       Dictionary of shortest path lengths keyed by target.
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> path=nx.single_source_dijkstra_path(G,0)
-    >>> path[4]
-    [0, 1, 2, 3, 4]
-
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    See Also
-    --------
-    single_source_dijkstra()
+    None
 
     """
-    (length,path)=single_source_dijkstra(G,source, weight = weight,jump= jump)
-    return path
-
+    directory,size=cache
+    entries=[]
+    for name in os.listdir(directory):                                          # get size and last use of each entry
+        if(name.endswith('.npz')):
+            try:
+                stat=os.stat(os.path.join(directory,name))
+                entries.append((stat.st_mtime,stat.st_size,name))
+            except OSError:
+                pass
+    total=sum(e[1] for e in entries)
+    for mtime,nbytes,name in sorted(entries):                                   # remove oldest entries first
+        if(total<=size):
+            break
+        try:
+            os.remove(os.path.join(directory,name))
+        except OSError:                                                         # entry was already removed by another worker
+            pass
+        total-=nbytes
+    return None
 
-def single_source_dijkstra_path_length(G, source, cutoff= None,
-                                       weight= 'weight',jump= 'jump'):
-    """Compute the shortest path length between source and all other
-    reachable nodes for a weighted graph.
+def cache_clear(cache,key=None):
+    """Invalidate entries of cache.
 
     Parameters
     ----------
-    G : NetworkX graph
+    cache : cache (see cache_open)
+    key : key of entry to remove (None = remove all entries)
+    
+    Returns
+    -------
+    None
 
-    source : node label
-       Starting node for path
+    """
+    directory=cache[0]
+    names=[key+'.npz'] if key is not None else [n for n in os.listdir(directory) if n.endswith('.npz')]
+    for name in names:
+        try:
+            os.remove(os.path.join(directory,name))
+        except OSError:
+            pass
+    return None
 
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight.
+#%%############################################################################# series functions
 
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
+def series_read(name):
+    """Open TIFF image series without loading it into memory.
 
+    Parameters
+    ----------
+    name : name and directory of TIFF file
+    
     Returns
     -------
-    length : dictionary
-       Dictionary of shortest lengths keyed by target.
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> length=nx.single_source_dijkstra_path_length(G,0)
-    >>> length[4]
-    4
-    >>> print(length)
-    {0: 0, 1: 1, 2: 2, 3: 3, 4: 4}
-
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    See Also
-    --------
-    single_source_dijkstra()
+    imO : read-only memory-mapped image series for uncompressed files, or lazy image series that reads frames page by page otherwise (see TiffSeries)
 
     """
-    dist = {}  # dictionary of final distances
-    jumq={}
-    seen = {source:0}
-    fringe=[] # use heapq with (distance,label) tuples
-    heapq.heappush(fringe,(0,source,0))
-    while fringe:
-        (d,v,j)=heapq.heappop(fringe)
-        if v in dist:
-            continue # already searched this node.
-        dist[v] = d
-        jumq[v] = j#jumq[v]+vw_jumq
-        #for ignore,w,edgedata in G.edges_iter(v,data=True):
-        #is about 30% slower than the following
-        if G.is_multigraph():
-            edata=[]
-            for w,keydata in G[v].items():
-                minweight=min((dd.get(weight,1)
-                               for k,dd in keydata.items()))
-                edata.append((w,{weight:minweight}))
-        else:
-            edata=iter(G[v].items())
-
-        for w,edgedata in edata:	
-            vw_jumq = jumq[v] + edgedata.get(jump,1)
-            ddist=edgedata.get(weight,1)
-            vw_dist = dist[v] + ddist
-            if(vw_dist<9999.0):
-                if(int(vw_jumq)>1 or int(vw_jumq%1.0*1000.0+0.5)>1):
-                    ddist=9999.0
-            vw_dist = dist[v] + ddist
-            
-            if cutoff is not None:
-                if vw_dist>cutoff:
-                    continue
-            if w in dist:
-                if vw_dist < dist[w]:
-                    raise ValueError('Contradictory paths found:',
-                                     'negative weights?')
-            elif w not in seen or vw_dist < seen[w]:
-                seen[w] = vw_dist
-                heapq.heappush(fringe,(vw_dist,w,vw_jumq))
-    return dist,jumq
-
-
-def single_source_dijkstra(G,source,target=None,cutoff=None,weight='weight',jump='jump'):
-    """Compute shortest paths and lengths in a weighted graph G.
-
-    Uses Dijkstra's algorithm for shortest paths.
-
-    Parameters
-    ----------
-    G : NetworkX graph
-
-    source : node label
-       Starting node for path
-
-    target : node label, optional
-       Ending node for path
-
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
-
-    Returns
-    -------
-    distance,path : dictionaries
-       Returns a tuple of two dictionaries keyed by node.
-       The first dictionary stores distance from the source.
-       The second stores the path from the source to that node.
-
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> length,path=nx.single_source_dijkstra(G,0)
-    >>> print(length[4])
-    4
-    >>> print(length)
-    {0: 0, 1: 1, 2: 2, 3: 3, 4: 4}
-    >>> path[4]
-    [0, 1, 2, 3, 4]
-
-    Notes
-    ---------
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    Based on the Python cookbook recipe (119466) at
-    http://aspn.activestate.com/ASPN/Cookbook/Python/Recipe/119466
-
-    This algorithm is not guaranteed to work if edge weights
-    are negative or are floating point numbers
-    (overflows and roundoff errors can cause problems).
-
-    See Also
-    --------
-    single_source_dijkstra_path()
-    single_source_dijkstra_path_length()
-    """
-    if source==target:
-        return ({source:0}, {source:[source]})
-    dist = {}  # dictionary of final distances
-    paths = {source:[source]}  # dictionary of paths
-    seen = {source:0}
-    fringe=[] # use heapq with (distance,label) tuples
-    heapq.heappush(fringe,(0,source))
-    while fringe:
-        (d,v)=heapq.heappop(fringe)
-        if v in dist:
-            continue # already searched this node.
-        dist[v] = d
-        if v == target:
-            break
-        #for ignore,w,edgedata in G.edges_iter(v,data=True):
-        #is about 30% slower than the following
-        if G.is_multigraph():
-            edata=[]
-            for w,keydata in G[v].items():
-                minweight=min((dd.get(weight,1)
-                               for k,dd in keydata.items()))
-                edata.append((w,{weight:minweight}))
-        else:
-            edata=iter(G[v].items())
-
-        for w,edgedata in edata:
-            vw_dist = dist[v] + edgedata.get(weight,1)
-            if cutoff is not None:
-                if vw_dist>cutoff:
-                    continue
-            if w in dist:
-                if vw_dist < dist[w]:
-                    raise ValueError('Contradictory paths found:',
-                                     'negative weights?')
-            elif w not in seen or vw_dist < seen[w]:
-                seen[w] = vw_dist
-                heapq.heappush(fringe,(vw_dist,w))
-                paths[w] = paths[v]+[w]
-    return (dist,paths)
-
-
-def dijkstra_predecessor_and_distance(G,source, cutoff=None, weight='weight'):
-    """Compute shortest path length and predecessors on shortest paths
-    in weighted graphs.
-
-    Parameters
-    ----------
-    G : NetworkX graph
-
-    source : node label
-       Starting node for path
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
-
-    Returns
-    -------
-    pred,distance : dictionaries
-       Returns two dictionaries representing a list of predecessors
-       of a node and the distance to each node.
-
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    The list of predecessors contains more than one element only when
-    there are more than one shortest paths to the key node.
-    """
-    push=heapq.heappush
-    pop=heapq.heappop
-    dist = {}  # dictionary of final distances
-    pred = {source:[]}  # dictionary of predecessors
-    seen = {source:0}
-    fringe=[] # use heapq with (distance,label) tuples
-    push(fringe,(0,source))
-    while fringe:
-        (d,v)=pop(fringe)
-        if v in dist: continue # already searched this node.
-        dist[v] = d
-        if G.is_multigraph():
-            edata=[]
-            for w,keydata in G[v].items():
-                minweight=min((dd.get(weight,1)
-                               for k,dd in keydata.items()))
-                edata.append((w,{weight:minweight}))
-        else:
-            edata=iter(G[v].items())
-        for w,edgedata in edata:
-            vw_dist = dist[v] + edgedata.get(weight,1)
-            if cutoff is not None:
-                if vw_dist>cutoff:
-                    continue
-            if w in dist:
-                if vw_dist < dist[w]:
-                    raise ValueError('Contradictory paths found:',
-                                     'negative weights?')
-            elif w not in seen or vw_dist < seen[w]:
-                seen[w] = vw_dist
-                push(fringe,(vw_dist,w))
-                pred[w] = [v]
-            elif vw_dist==seen[w]:
-                pred[w].append(v)
-    return (pred,dist)
-
+    try:
+        imO=tifffile.memmap(name,mode='r')                                      # map uncompressed image data directly
+    except ValueError:                                                          # read compressed or fragmented image data page by page otherwise
+        imO=utils.TiffSeries(name)
+    return imO
 
-def all_pairs_dijkstra_path_length(G, cutoff=None, weight='weight',jump= 'jump'):
-    """ Compute shortest path lengths between all nodes in a weighted graph.
+class TiffSeries(object):
+    """Read-only image series of TIFF file that reads single frames on demand.
 
     Parameters
     ----------
-    G : NetworkX graph
+    name : name and directory of TIFF file
 
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
+    """
+    def __init__(self,name):
+        self.name=name
+        self.tif=tifffile.TiffFile(name)
+        series=self.tif.series[0]
+        self.shape=tuple(series.shape)                                          # axes of series as returned by tifffile.imread
+        self.dtype=np.dtype(series.dtype)
+        P=len(series.pages)
+        self.pages=P//self.shape[0] if(P%self.shape[0]==0) else 0               # number of pages per frame (0 = frames are not stored in separate pages)
+        self.data=None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self,i):
+        i=range(len(self))[i]                                                   # check frame index
+        if(self.pages==0):                                                      # read whole series once if frames share pages
+            if(self.data is None):
+                self.data=self.tif.asarray(series=0)
+            return self.data[i]
+        im=self.tif.asarray(key=range(i*self.pages,(i+1)*self.pages),series=0)  # read pages of selected frame
+        return im.reshape(self.shape[1:])
+
+    def close(self):
+        self.tif.close()
+
+def series_frames(imO,frames=None):
+    """Iterate over frames of image series.
 
+    Parameters
+    ----------
+    imO : image series (array, memory-mapped array, or TiffSeries)
+    frames : list of frames (None = all frames)
+    
     Returns
     -------
-    distance : dictionary
-       Dictionary, keyed by source and target, of shortest path lengths.
+    imI : three-dimensional frame (y,x,z), read one at a time
 
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> length=nx.all_pairs_dijkstra_path_length(G)
-    >>> print(length[1][4])
-    3
-    >>> length[1]
-    {0: 1, 1: 0, 2: 1, 3: 2, 4: 3}
-
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
-
-    The dictionary returned only has keys for reachable node pairs.
     """
-    paths={}
-    for n in G:
-        paths[n]=single_source_dijkstra_path_length(G,n, cutoff=cutoff,
-                                                    weight=weight,jump=jump)
-    return paths
+    if(frames is None):
+        frames=range(len(imO))
+    for i in frames:
+        yield utils.im2d3d(imO[i])
 
-def all_pairs_dijkstra_path(G, cutoff=None, weight='weight',jump='jump'):
-    """ Compute shortest paths between all nodes in a weighted graph.
+def series_share(imO):
+    """Share image series with worker processes through a memory-mapped file.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
-    cutoff : integer or float, optional
-       Depth to stop the search. Only paths of length <= cutoff are returned.
-
+    imO : image series (array, memory-mapped array, or TiffSeries)
+    
     Returns
     -------
-    distance : dictionary
-       Dictionary, keyed by source and target, of shortest paths.
-
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> path=nx.all_pairs_dijkstra_path(G)
-    >>> print(path[0][4])
-    [0, 1, 2, 3, 4]
+    spec : tuple of file name, data type, shape, and offset of memory-mapped series (offset None = TIFF file read page by page)
+    temp : temporary directory to remove after processing (None if series was already memory-mapped or is read from TIFF file)
 
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
+    """
+    if(isinstance(imO,utils.TiffSeries)):                                      # if series is read from TIFF file...
+        spec=(imO.name,imO.dtype.str,imO.shape,None)
+        temp=None
+    elif(isinstance(imO,np.memmap) and isinstance(imO.base,mmap.mmap) and imO.filename is not None): # if series is already memory-mapped...
+        spec=(imO.filename,imO.dtype.str,imO.shape,imO.offset)
+        temp=None
+    else:                                                                       # copy series to memory-mapped file otherwise
+        temp=tempfile.mkdtemp()
+        name=os.path.join(temp,'series.npy')
+        imM=np.lib.format.open_memmap(name,mode='w+',dtype=imO.dtype,shape=imO.shape)
+        imM[:]=imO
+        imM.flush()
+        spec=(name,imO.dtype.str,imO.shape,imM.offset)
+        del imM
+    return spec,temp
+
+def series_open(spec):
+    """Open image series shared by series_share.
 
-    See Also
-    --------
-    floyd_warshall()
+    Parameters
+    ----------
+    spec : tuple of file name, data type, shape, and offset of memory-mapped series (offset None = TIFF file read page by page)
+    
+    Returns
+    -------
+    imO : read-only memory-mapped image series or TiffSeries
 
     """
-    paths={}
-    for n in G:
-        paths[n]=single_source_dijkstra_path(G, n, cutoff=cutoff,
-                                             weight=weight,jump=jump)
-    return paths
-
-def bellman_ford(G, source, weight = 'weight'):
-    """Compute shortest path lengths and predecessors on shortest paths
-    in weighted graphs.
+    name,dtype,shape,offset=spec
+    if(offset is None):                                                         # open TIFF file independently in each process
+        imO=utils.TiffSeries(name)
+    else:
+        imO=np.memmap(name,dtype=dtype,mode='r',shape=shape,offset=offset)
+    return imO
 
-    The algorithm has a running time of O(mn) where n is the number of
-    nodes and m is the number of edges.  It is slower than Dijkstra but
-    can handle negative edge weights.
+def series_init(spec):
+    """Open image series shared by series_share once per worker process.
 
     Parameters
     ----------
-    G : NetworkX graph
-       The algorithm works for all types of graphs, including directed
-       graphs and multigraphs.
-
-    source: node label
-       Starting node for path
+    spec : tuple of file name, data type, shape, and offset of memory-mapped series (see series_share)
+    
+    Returns
+    -------
+    None
 
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
+    """
+    global series_shared
+    series_shared=utils.series_open(spec)                                       # keep series open for all tasks of this worker
+    return None
+    
+def null_model(graph,pos,mask,imG,planar=1,weights=0,rng=None,paths=0):
+    """Generate and analyze randomized network.
 
+    Parameters
+    ----------
+    graph : unified graph of biological network
+    pos : node positions
+    mask : binary array of cellular region of interest
+    imG : Gaussian filtered image of filament structures
+    planar : ignore edge crossings (=0) or favor planar graph by reducing number of edge crossings (=1)
+    weights : shuffle only edge capacities (=0) or node positions and edges (=1)
+    rng : random number generator (numpy RandomState; None = global random state)
+    paths : exact (=0) or sampled (=1 uniformly, =2 stratified by component) path length statistics
+    
     Returns
     -------
-    pred, dist : dictionaries
-       Returns two dictionaries keyed by node to predecessor in the
-       path and to the distance from the source respectively.
+    graph : randomized, connected, and normalized graph
+    poz : randomized node positions
+    quant : list of graph properties
 
-    Raises
-    ------
-    NetworkXUnbounded
-       If the (di)graph contains a negative cost (di)cycle, the
-       algorithm raises an exception to indicate the presence of the
-       negative cost (di)cycle.  Note: any negative weight edge in an
-       undirected graph is a negative cost cycle.
+    """
+    gRo,poz=utils.randomize_graph(graph,pos,mask,planar=planar,weights=weights,rng=rng) # randomize biological network
+    gRu=utils.unify_graph(gRo)                                                  # project multigraph to simple graph
+    gRc=utils.connect_graph(gRu,poz,imG)                                        # connect disconnected components of graph
+    gRx=utils.centralize_graph(gRc)                                             # compute edge centrality measures
+    gRn=utils.normalize_graph(gRx)                                              # normalize total edge capacity to one        
+    quant=utils.compute_graph(gRn,poz,mask,paths,rng=rng)                       # compute graph properties         
+    return gRn,poz,quant
 
-    Examples
-    --------
-    >>> import networkx as nx
-    >>> G = nx.path_graph(5, create_using = nx.DiGraph())
-    >>> pred, dist = nx.bellman_ford(G, 0)
-    >>> pred
-    {0: None, 1: 0, 2: 1, 3: 2, 4: 3}
-    >>> dist
-    {0: 0, 1: 1, 2: 2, 3: 3, 4: 4}
+def null_worker(args):
+    """Generate and analyze randomized network with shared intensity image.
 
-    >>> from nose.tools import assert_raises
-    >>> G = nx.cycle_graph(5, create_using = nx.DiGraph())
-    >>> G[1][2]['weight'] = -7
-    >>> assert_raises(nx.NetworkXUnbounded, nx.bellman_ford, G, 0)
+    Parameters
+    ----------
+    args : tuple of graph, node positions, mask, shared image (see series_share), planar, weights, seed, frame, replicate, and paths
+    
+    Returns
+    -------
+    data : list of randomized graph, node positions, and graph properties
 
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
+    """
+    graph,pos,mask,spec,planar,weights,seed,frame,r,paths=args
+    imG=utils.series_open(spec)                                                 # open shared intensity image
+    data=list(utils.null_model(graph,pos,mask,imG,planar,weights,utils.null_seed(seed,frame,r),paths))
+    del imG
+    return data
 
-    The dictionaries returned only have keys for nodes reachable from
-    the source.
+def randomize_series(graph,pos,mask,imG,R,planar=1,weights=0,seed=None,frame=0,processes=None,paths=0):
+    """Generate and analyze randomized networks in parallel.
 
-    In the case where the (di)graph is not connected, if a component
-    not containing the source contains a negative cost (di)cycle, it
-    will not be detected.
+    Parameters
+    ----------
+    graph : unified graph of biological network
+    pos : node positions
+    mask : binary array of cellular region of interest
+    imG : Gaussian filtered image of filament structures
+    R : number of randomized networks
+    planar : ignore edge crossings (=0) or favor planar graph by reducing number of edge crossings (=1)
+    weights : shuffle only edge capacities (=0) or node positions and edges (=1)
+    seed : base seed of analysis (None = draw from global random state)
+    frame : frame index used for seeding
+    processes : number of worker processes (None = number of CPUs; 1 = no worker processes)
+    paths : exact (=0) or sampled (=1 uniformly, =2 stratified by component) path length statistics
+    
+    Returns
+    -------
+    data : list of randomized graph, node positions, and graph properties for each replicate in replicate order
+        (identical for any number of processes)
 
     """
-    if source not in G:
-        raise KeyError("Node %s is not found in the graph"%source)
-    numb_nodes = len(G)
-
-    dist = {source: 0}
-    pred = {source: None}
+    if(seed is None):
+        seed=np.random.randint(2**31)
+    if(processes==1):                                                           # if no worker processes...
+        data=[list(utils.null_model(graph,pos,mask,imG,planar,weights,utils.null_seed(seed,frame,r),paths)) for r in range(R)]
+        return data
+    spec,temp=utils.series_share(imG)                                           # share intensity image with workers
+    try:
+        args=[(graph,pos,mask,spec,planar,weights,seed,frame,r,paths) for r in range(R)]
+        pool=multiprocessing.Pool(processes)                                    # distribute replicates over worker processes
+        try:
+            data=pool.map(utils.null_worker,args,chunksize=1)                   # collect results in replicate order
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        if(temp is not None):                                                   # remove temporary memory-mapped file
+            shutil.rmtree(temp,ignore_errors=True)
+    return data
+    
+def extract_frame(imI,mask,sigma,block,small,factr,randn=0,randw=0,seed=0,frame=0,paths=0,cache=None,randp=1):
+    """Extract and analyze network and randomized networks of single frame.
 
-    if numb_nodes == 1:
-       return pred, dist
+    Parameters
+    ----------
+    imI : actin image of single frame
+    mask : binary array of cellular region of interest
+    sigma : width of tubeness filter and filament structures
+    block : block size of adaptive median filter
+    small : size of smallest components
+    factr : fraction of average intensity below which components are removed
+    randn : number of randomized networks
+    randw : randomization method (0 = shuffle edge weights only / 1 = shuffle nodes and edges)
+    seed : base seed of analysis
+    frame : frame index used for seeding
+    paths : exact (=0) or sampled (=1 uniformly, =2 stratified by component) path length statistics
+    cache : cache of skeleton and multigraph (see cache_open; None = no cache)
+    randp : number of worker processes for randomized networks (None = number of CPUs; 1 = no worker processes)
+    
+    Returns
+    -------
+    graph : extracted, connected, and normalized graph
+    pos : node positions
+    quant : list of graph properties
+    rand : list of randomized graph, node positions, and graph properties for each replicate
 
-    if G.is_multigraph():
-        def get_weight(edge_dict):
-            return min([eattr.get(weight,1) for eattr in edge_dict.values()])
-    else:
-        def get_weight(edge_dict):
-            return edge_dict.get(weight,1)
-
-    for i in range(numb_nodes):
-        no_changes=True
-        # Only need edges from nodes in dist b/c all others have dist==inf
-        for u, dist_u in list(dist.items()): # get all edges from nodes in dist
-            for v, edict in G[u].items():  # double loop handles undirected too
-                dist_v = dist_u + get_weight(edict)
-                if v not in dist or dist[v] > dist_v:
-                    dist[v] = dist_v
-                    pred[v] = u
-                    no_changes = False
-        if no_changes:
-            break
+    """
+    imI=utils.im2d3d(np.array(imI))                                             # load frame and convert 2D image to 3D
+    imG=skimage.filters.gaussian(imI,sigma)                                     # apply Gaussian filter                                    
+    keyA,keyE,data=None,None,None
+    if(cache is not None):                                                      # get cache keys of skeleton and graph
+        keyA=utils.cache_key('skeleton',imI,mask,sigma,block,small,factr)
+        keyE=utils.cache_key('graph',keyA)
+        data=utils.cache_load(cache,keyE)
+    if(data is not None):                                                       # load cached graph
+        imE=(data['crd'],data['nbrs'],data['labs'],tuple(data['shape']))
+        pos,tBo=data['pos'],data['table']
+        gBo=utils.table_graph(tBo,len(pos),multi=1)
+        utils.normalize_image(imG,mask)                                         # scale intensities as skeletonize_graph does
     else:
-        raise nx.NetworkXUnbounded("Negative cost cycle detected.")
-    return pred, dist
-
-def negative_edge_cycle(G, weight = 'weight'):
-    """Return True if there exists a negative edge cycle anywhere in G.
+        data=utils.cache_load(cache,keyA)
+        if(data is not None):                                                   # load cached skeleton
+            imA=data['imA']
+            utils.normalize_image(imG,mask)                                     # scale intensities as skeletonize_graph does
+        else:
+            imR,imA=utils.skeletonize_graph(imG,mask,sigma,block,small,factr)   # filter and skeletonize actin image
+            utils.cache_save(cache,keyA,imA=imA)
+        imE=utils.node_graph(utils.skeleton_sparse(imA>0),imG)                  # detect filaments and network nodes
+        gBo,pos,tBo=utils.make_graph(imE,imG,table=1)                           # construct graph from filament and node image
+        utils.cache_save(cache,keyE,crd=imE[0],nbrs=imE[1],labs=imE[2],shape=imE[3],pos=pos,table=tBo)
+    gBu=utils.unify_graph(gBo,tBo)                                              # project multigraph to simple graph
+    gBc=utils.connect_graph(gBu,pos,imG)                                        # connect disconnected components of graph
+    gBx=utils.centralize_graph(gBc)                                             # compute edge centrality measures
+    gBn=utils.normalize_graph(gBx)                                              # normalize total edge capacity to one    
+    quant=utils.compute_graph(gBn,pos,mask,paths,rng=np.random.RandomState([seed,frame])) # compute graph properties
+    rand=utils.randomize_series(gBu,pos,mask,imG,randn,1,randw,seed,frame,processes=randp,paths=paths) # randomize biological network
+    return gBn,pos,quant,rand
+
+def extract_worker(args):
+    """Extract and analyze network of single frame of shared image series.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
-
+    args : tuple of frame index and parameters of extract_frame (series is opened by series_init)
+    
     Returns
     -------
-    negative_cycle : bool
-        True if a negative edge cycle exists, otherwise False.
+    data : list of network and randomized networks (see extract_frame)
 
-    Examples
-    --------
-    >>> import networkx as nx
-    >>> G = nx.cycle_graph(5, create_using = nx.DiGraph())
-    >>> print(nx.negative_edge_cycle(G))
-    False
-    >>> G[1][2]['weight'] = -7
-    >>> print(nx.negative_edge_cycle(G))
-    True
+    """
+    i,mask,sigma,block,small,factr,randn,randw,seed,paths,cache=args
+    data=utils.extract_frame(series_shared[i],mask,sigma,block,small,factr,randn,randw,seed,i,paths,cache) # extract network of selected frame
+    return data
 
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
+def extract_series(imO,mask,sigma,block,small,factr,randn=0,randw=0,seed=0,frames=None,processes=None,paths=0,cache=None,randp=1):
+    """Extract and analyze networks and randomized networks of all frames of image series in parallel.
 
-    This algorithm uses bellman_ford() but finds negative cycles
-    on any component by first adding a new node connected to
-    every node, and starting bellman_ford on that node.  It then
-    removes that extra node.
-    """
-    newnode = generate_unique_node()
-    G.add_edges_from([ (newnode,n) for n in G])
+    Parameters
+    ----------
+    imO : actin image series with frames along first axis (array, memory-mapped array, or TiffSeries; see series_read)
+    mask : binary array of cellular region of interest
+    sigma : width of tubeness filter and filament structures
+    block : block size of adaptive median filter
+    small : size of smallest components
+    factr : fraction of average intensity below which components are removed
+    randn : number of randomized networks per frame
+    randw : randomization method (0 = shuffle edge weights only / 1 = shuffle nodes and edges)
+    seed : base seed of analysis (randomized networks are reproducible for any number of processes)
+    frames : list of frames to process (None = all frames)
+    processes : number of worker processes for frames (None = number of CPUs; 1 = no worker processes)
+    paths : exact (=0) or sampled (=1 uniformly, =2 stratified by component) path length statistics
+    cache : cache of skeletons and multigraphs shared by all workers (see cache_open; None = no cache)
+    randp : number of worker processes for randomized networks of each frame (None = number of CPUs; 1 = no worker processes),
+        requires processes=1 as worker processes cannot start further workers
+    
+    Returns
+    -------
+    dataB : list of frame index, graph, node positions, and graph properties for each frame in frame order
+    dataR : list of frame index, randomized graph, node positions, and graph properties for each frame and replicate in frame order
 
-    try:
-        bellman_ford(G, newnode, weight)
-    except nx.NetworkXUnbounded:
-        G.remove_node(newnode)
-        return True
-    G.remove_node(newnode)
-    return False
+    """
+    if(processes!=1 and randp!=1):
+        raise ValueError('randomized networks can only be distributed over processes if frames are not (processes=1)')
+    if(frames is None):
+        frames=range(len(imO))
+    frames=list(frames)
+    if(processes==1):                                                           # if no worker processes...
+        data=[utils.extract_frame(imI,mask,sigma,block,small,factr,randn,randw,seed,i,paths,cache,randp) for i,imI in zip(frames,utils.series_frames(imO,frames))]
+    else:
+        spec,temp=utils.series_share(imO)                                       # share image series with workers
+        try:
+            args=[(i,mask,sigma,block,small,factr,randn,randw,seed,paths,cache) for i in frames]
+            pool=multiprocessing.Pool(processes,utils.series_init,(spec,))      # distribute frames over worker processes which open the series once
+            try:
+                data=pool.map(utils.extract_worker,args,chunksize=1)            # collect results in frame order
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            if(temp is not None):                                               # remove temporary memory-mapped file
+                shutil.rmtree(temp,ignore_errors=True)
+    dataB=[[i,gBn,pos,quant] for i,(gBn,pos,quant,rand) in zip(frames,data)]
+    dataR=[[i]+r for i,(gBn,pos,quant,rand) in zip(frames,data) for r in rand]
+    return dataB,dataR
 
+#%%############################################################################# periodic functions
 
-def bidirectional_dijkstra(G, source, target, weight = 'weight'):
-    """Dijkstra's algorithm for shortest paths using bidirectional search.
+def mask2rot(mask):
+    """Compute main axis of cellular region of interest.
 
     Parameters
     ----------
-    G : NetworkX graph
-
-    source : node
-       Starting node.
-
-    target : node
-       Ending node.
+    mask : binary array of cellular region of interest
+    
+    Returns
+    -------
+    c0,c1 : coordinates along cell axis
+    vc,vd : center point and direction vector of cell axis
+    angle : angle between y-axis and main cell axis
+    rot : rotation matrix
 
-    weight: string, optional (default='weight')
-       Edge data key corresponding to the edge weight
+    """   
+    line=skimage.morphology.skeletonize(mask)                                   # skeletonize mask
+    co=np.array(np.where(line>0)).T[:,::-1]                                     # get coordinates of skeleton line
+    L=int(len(co)*0.2)                                                          # get points 20% and 80%  along the cell axis
+    c0=co[L]
+    c1=co[-L]
+    vc=co[int(len(co)*0.5)]                                                     # get center point and direction vector of cell axis
+    vd=c0-c1
+    angle=utils.angle360(vd)                                            # compute angle of cell axis
+    angli=angle*np.pi/180.0                                                     # convert angle to radian
+    rot=np.array([[np.cos(angli),-np.sin(angli)],[np.sin(angli),np.cos(angli)]]) # compute rotation matrix
+    return c0,c1,vc,vd,angle,rot
+   
+def mask2poly(mask):
+    """Convert cellular region of interest to polygon.
 
+    Parameters
+    ----------
+    mask : binary array of cellular region of interest
+    
     Returns
     -------
-    length : number
-        Shortest path length.
+    polya : original polygon
+    polyn : rotated polygon aligned with y-axis
 
-    Returns a tuple of two dictionaries keyed by node.
-    The first dictionary stores distance from the source.
-    The second stores the path from the source to that node.
+    """   
+    maski=sp.ndimage.minimum_filter(mask,3,mode='constant',cval=0)              # shrink mask 
+    polya=skimage.measure.find_contours(maski,0)[0]                             # find contours
+    polya=skimage.measure.approximate_polygon(polya,tolerance=0.0)              # approximate polygon
+    polya=1.0*remove_duplicates(polya)                                          # remove duplicate points
+    c0,c1,vc,vd,an,rot=mask2rot(maski)                                          # compute cell axis
+    polyn=np.dot(polya,rot)                                                     # rotate polygon
+    return polya[:,::-1],polyn[:,::-1]    
+  
+def pbc_jnet_border(polyn):    
+    """Compute border of jump network.
 
-    Raises
-    ------
-    NetworkXNoPath
-        If no path exists between source and target.
+    Parameters
+    ----------
+    polyn : rotated polygon of cellular region of interest
+    
+    Returns
+    -------
+    graph : border of jump network
 
-    Examples
-    --------
-    >>> G=nx.path_graph(5)
-    >>> length,path=nx.bidirectional_dijkstra(G,0,4)
-    >>> print(length)
-    4
-    >>> print(path)
-    [0, 1, 2, 3, 4]
+    """   
+    polyi=1.0*polyn.astype('int')                                               # convert coordinates to integers
+    polys=shapely.geometry.Polygon(polyi)                                       # convert polygon to shapely polygon
+    B=len(polyi)                                                                # get number of polygon points
+    graph=nx.empty_graph(B)                                                     # create new, empty graph 
+    for i in range(2):                                                          # for both x- and y-components...
+        bx=polyi[:,i]                                                           # get coordinate
+        for idx,x in enumerate(set(bx)):                                        # for each point
+            yy=np.sort(np.where(x==bx)[0])                                      # get other points with same coordinate
+            Y=len(yy)
+            for y in range(Y-1):                                                # for each other point with same coordinate
+                y1,y2=yy[y],yy[y+1]
+                line=shapely.geometry.LineString([polyi[y1],polyi[y2]])         # draw line between the two selected points
+                if(line.within(polys)):                                         # if the line is fully contained within the polygon...
+                    graph.add_edge(y1,y2,weight=0.0,jump=0.001**i)              # add the to network (jump=0.001/0.00001 lines parallel to along x/y-axis)
+    distb=sp.spatial.distance_matrix(polyn,polyn)                               # compute distance matrix between point of polygon
+    for b1 in range(B):                                                         # for each point along polygon
+        b2=np.mod(b1+1,B)
+        graph.add_edge(b1,b2,weight=distb[b1,b2],jump=0.0)                      # add edge no neighboring point
+    return graph                
 
-    Notes
-    -----
-    Edge weight attributes must be numerical.
-    Distances are calculated as sums of weighted edges traversed.
+def pbc_jnet_interior(pos,polya,jborder,cthres=10.0,dthres=None,src=0):
+    """Compute interier of jump network.
 
-    In practice  bidirectional Dijkstra is much more than twice as fast as
-    ordinary Dijkstra.
+    Parameters
+    ----------
+    pos : node positions
+    polya : original polygon of cellular region of interest
+    jborder : border of jump network
+    cthres : maximum edge length between nodes of original network and border of jump network
+    dthres : maximum length of computed shortest paths, which are only computed from nodes closer than dthres to the border (None = all paths from all nodes), requires src=1
+    src : return nodes of jump network corresponding to rows of shortest path arrays (=1) or not (=0)
+    
+    Returns
+    -------
+    jnet : complete jump network
+    SP : array of predecessors on shortest paths (see jump_paths)
+    SL : array of shortest path lengths 
+    JV : array of numbers of vertical jumps
+    JH : array of numbers of horizonal jumps
+    src : nodes of jump network corresponding to rows of SP, SL, JV, JH, only if src=1
 
-    Ordinary Dijkstra expands nodes in a sphere-like manner from the
-    source. The radius of this sphere will eventually be the length
-    of the shortest path. Bidirectional Dijkstra will expand nodes
-    from both the source and the target, making two spheres of half
-    this radius. Volume of the first sphere is pi*r*r while the
-    others are 2*pi*r/2*r/2, making up half the volume.
+    """          
+    if(dthres is not None and not src):
+        raise ValueError('shortest paths from nodes close to the border require src=1')
+    jnet=jborder.copy()                                                         # copy border of jump network
+    B=jnet.number_of_nodes()                                                    # get number of nodes
+    jnet.graph['pos']=np.vstack([polya,pos[:,:2]])                              # store positions of border points and nodes
+    tree=sp.spatial.cKDTree(polya)                                              # find border points close to nodes
+    near=tree.query_ball_point(pos[:,:2],cthres)
+    for n in range(len(pos)):                                                   # for each node...
+        jnet.add_node(B+n)                                                      # add node to jump network
+        idx=np.array(sorted(near[n]),dtype='int')
+        distn=sp.spatial.minkowski_distance(pos[n,:2],polya[idx])                  # compute distances between node position and border of jump network
+        for e,d in zip(idx[distn<cthres],distn[distn<cthres]):                  # add edge if node is close enough to border of jump network
+            jnet.add_edge(B+n,e,weight=d,jump=0.0)
+    for n in range(len(pos)):                                                   # for each node...                                                  
+        if(jnet.degree(B+n)==0):                                                # add dummy edge to make network connected if node is disconnected
+            jnet.add_edge(B+n,0,weight=9999.0,jump=0.0)   
+    if(dthres is None):                                                         # compute all shortest path lengths, jumps, and predecessors in jump network
+        rows=np.arange(jnet.number_of_nodes())
+        SL,JV,JH,SP=utils.jump_paths(jnet,weight='weight',jump='jump')
+    else:                                                                       # or only short paths from nodes close to the border
+        dn,en=tree.query(pos[:,:2],distance_upper_bound=min(cthres,dthres))
+        rows=B+np.flatnonzero(dn<min(cthres,dthres))
+        SL,JV,JH,SP=utils.jump_paths(jnet,weight='weight',jump='jump',indices=rows,limit=dthres)
+    if(src):
+        return jnet,SP,SL,JV,JH,rows
+    return jnet,SP,SL,JV,JH
+          
+def jump_paths(jnet,weight='weight',jump='jump',chunk=256,indices=None,limit=np.inf):
+    """Compute all shortest paths in jump network with at most one vertical and one horizontal jump.
 
-    This algorithm is not guaranteed to work if edge weights
-    are negative or are floating point numbers
-    (overflows and roundoff errors can cause problems).
+    Parameters
+    ----------
+    jnet : jump network with jump sizes 1.0 and 0.001 for vertical and horizontal jump edges
+    weight : edge property used as edge length
+    jump : edge property used as jump size
+    chunk : number of source nodes per Dijkstra call
+    indices : source nodes (None = all nodes)
+    limit : maximum length of shortest paths
+    
+    Returns
+    -------
+    SL : array of shortest path lengths from source nodes (inf = not reachable within limit) 
+    JV : array of numbers of vertical jumps
+    JH : array of numbers of horizonal jumps
+    SP : int32 array of predecessors in network layered by jumps (see jump_path)
 
-    See Also
-    --------
-    shortest_path
-    shortest_path_length
     """
-    if source == target: return (0, [source])
-    #Init:   Forward             Backward
-    dists =  [{},                {}]# dictionary of final distances
-    paths =  [{source:[source]}, {target:[target]}] # dictionary of paths
-    fringe = [[],                []] #heap of (distance, node) tuples for extracting next node to expand
-    seen =   [{source:0},        {target:0} ]#dictionary of distances to nodes seen
-    #initialize fringe heap
-    heapq.heappush(fringe[0], (0, source))
-    heapq.heappush(fringe[1], (0, target))
-    #neighs for extracting correct neighbor information
-    if G.is_directed():
-        neighs = [G.successors_iter, G.predecessors_iter]
-    else:
-        neighs = [G.neighbors_iter, G.neighbors_iter]
-    #variables to hold shortest discovered path
-    #finaldist = 1e30000
-    finalpath = []
-    dir = 1
-    while fringe[0] and fringe[1]:
-        # choose direction
-        # dir == 0 is forward direction and dir == 1 is back
-        dir = 1-dir
-        # extract closest to expand
-        (dist, v )= heapq.heappop(fringe[dir])
-        if v in dists[dir]:
-            # Shortest path to v has already been found
-            continue
-        # update distance
-        dists[dir][v] = dist #equal to seen[dir][v]
-        if v in dists[1-dir]:
-            # if we have scanned v in both directions we are done
-            # we have now discovered the shortest path
-            return (finaldist,finalpath)
-
-        for w in neighs[dir](v):
-            if(dir==0): #forward
-                if G.is_multigraph():
-                    minweight=min((dd.get(weight,1)
-                               for k,dd in G[v][w].items()))
-                else:
-                    minweight=G[v][w].get(weight,1)
-                vwLength = dists[dir][v] + minweight #G[v][w].get(weight,1)
-            else: #back, must remember to change v,w->w,v
-                if G.is_multigraph():
-                    minweight=min((dd.get(weight,1)
-                               for k,dd in G[w][v].items()))
-                else:
-                    minweight=G[w][v].get(weight,1)
-                vwLength = dists[dir][v] + minweight #G[w][v].get(weight,1)
-
-            if w in dists[dir]:
-                if vwLength < dists[dir][w]:
-                    raise ValueError("Contradictory paths found: negative weights?")
-            elif w not in seen[dir] or vwLength < seen[dir][w]:
-                # relaxing
-                seen[dir][w] = vwLength
-                heapq.heappush(fringe[dir], (vwLength,w))
-                paths[dir][w] = paths[dir][v]+[w]
-                if w in seen[0] and w in seen[1]:
-                    #see if this path is better than than the already
-                    #discovered shortest path
-                    totaldist = seen[0][w] + seen[1][w]
-                    if finalpath == [] or finaldist > totaldist:
-                        finaldist = totaldist
-                        revpath = paths[1][w][:]
-                        revpath.reverse()
-                        finalpath = paths[0][w] + revpath[1:]
-    raise nx.NetworkXNoPath("No path between %s and %s." % (source, target))
-
+    M=jnet.number_of_nodes()
+    table=utils.edge_table(jnet,[weight,jump])
+    u=np.hstack([table['src'],table['dst']])                                    # get both directions of undirected edges
+    v=np.hstack([table['dst'],table['src']])
+    w=np.hstack([table[weight],table[weight]])
+    j=np.hstack([table[jump],table[jump]])
+    jv=np.floor(j+0.5).astype('int')                                            # get vertical and horizontal jumps of edges
+    jh=np.floor(np.mod(j,1.0)*1000.0+0.5).astype('int')
+    rows,cols,data=[],[],[]
+    for lv,lh in itertools.product([0,1],repeat=2):                             # connect layers of jump network by jump edges and skip edges with too many jumps
+        kv,kh=lv+jv,lh+jh
+        idx=(kv<=1)*(kh<=1)
+        rows.append((2*lv+lh)*M+u[idx])
+        cols.append((2*kv[idx]+kh[idx])*M+v[idx])
+        data.append(w[idx])
+    A=sp.sparse.csr_matrix((np.hstack(data),(np.hstack(rows),np.hstack(cols))),shape=(4*M,4*M)) # explicit zeros are kept as edges of zero length
+    indices=np.arange(M) if indices is None else np.array(indices)
+    S=len(indices)
+    SL=np.zeros((S,M))
+    layer=np.zeros((S,M),dtype='int')
+    SP=np.zeros((S,4*M),dtype='int32')
+    for c in range(0,S,chunk):                                                  # for each chunk of source nodes...
+        idx=np.arange(c,min(c+chunk,S))
+        D,SP[idx]=sp.sparse.csgraph.dijkstra(A,indices=indices[idx],return_predecessors=True,limit=limit) # compute shortest paths in layered network
+        D=D.reshape(len(idx),4,M)
+        layer[idx]=np.argmin(D,axis=1)                                          # choose layer of shortest path with fewest jumps
+        SL[idx]=np.min(D,axis=1)
+    JV=1.0*(layer//2)                                                           # get number of vertical jumps
+    JH=1.0*(layer%2)                                                            # get number of horizonal jumps
+    return SL,JV,JH,SP
+
+def jump_path(SP,JV,JH,source,target):
+    """Reconstruct shortest path in jump network.
 
+    Parameters
+    ----------
+    SP : array of predecessors (see jump_paths)
+    JV,JH : arrays of numbers of vertical and horizontal jumps
+    source : row of source node
+    target : target node
+    
+    Returns
+    -------
+    path : list of nodes along shortest path
 
+    """
+    M=SP.shape[1]//4
+    node=int(2*JV[source,target]+JH[source,target])*M+target                    # get target node in layer of shortest path
+    path=[]
+    while(node>=0):                                                             # follow predecessors back to source node
+        path.append(node%M)
+        node=SP[source,node]
+    return path[::-1]
@@ -36,8 +36,8 @@ gg='golgi_filter.tif'
 
 #%%############################################################################# extract and randomize networks
 
-imO=skimage.io.imread(path+aa,plugin='tifffile')[0]                             # open first frame of actin image
-imT=skimage.io.imread(path+gg,plugin='tifffile')[0]                             # open Golgi image
+imO=utils.series_read(path+aa)[0]                                               # open first frame of actin image without loading the whole movie
+imT=utils.series_read(path+gg)[0]                                               # open first frame of Golgi image without loading the whole movie
 mask=skimage.io.imread(path+'mask.tif',plugin='tifffile')>0                     # open mask
 
 track=utils.xmlread(path+'track.xml')                                           # read Golgi tracking results
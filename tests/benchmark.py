@@ -0,0 +1,150 @@
+################################################################################
+# Module: benchmark.py
+# Description: Benchmark network extraction and analysis functions
+# License: GPL3, see full license in LICENSE.txt
+# Web: https://github.com/DavidBreuer/CytoSeg
+################################################################################
+
+#%%############################################################################# imports
+
+import networkx as nx
+import numpy as np
+import scipy as sp
+import scipy.ndimage
+import skimage
+import skimage.draw
+import skimage.morphology
+import sys
+import time
+import tracemalloc
+
+sys.path.append('../CytoSeg')
+import utils
+
+#%%############################################################################# help functions
+
+def synthetic_skeleton(ly,lx,lz,L,seed=0,thin=1):
+    """Generate skeletonized image of random straight filaments.
+
+    Parameters
+    ----------
+    ly,lx,lz : image dimensions
+    L : number of filaments
+    seed : seed of random number generator
+    thin : skeletonize crossings of filaments (=1) or not (=0)
+
+    Returns
+    -------
+    imA : binary skeleton image
+
+    """
+    rng=np.random.RandomState(seed)
+    imA=np.zeros((ly,lx,lz),dtype='bool')
+    for l in range(L):                                                          # for each filament...
+        y0,y1=rng.randint(0,ly,2)                                               # draw line between random end points
+        x0,x1=rng.randint(0,lx,2)
+        z=rng.randint(0,lz)
+        rr,cc=skimage.draw.line(y0,x0,y1,x1)
+        imA[rr,cc,z]=1
+    if(thin):
+        imA=skimage.morphology.skeletonize_3d(imA)>0                            # skeletonize crossing filaments
+    return imA
+
+def synthetic_graph(N,E,L,seed=0):
+    """Generate random graph with short edges between nearby nodes.
+
+    Parameters
+    ----------
+    N : number of nodes
+    E : number of edges
+    L : side length of square area
+    seed : seed of random number generator
+
+    Returns
+    -------
+    graph : random graph
+    pos : node positions
+
+    """
+    rng=np.random.RandomState(seed)
+    pos=np.vstack([rng.randint(0,L,(2,N)),np.zeros(N)]).T.astype('int')
+    graph=nx.MultiGraph()
+    graph.add_nodes_from(range(N))
+    for e in range(E):                                                          # connect random node to one of its five nearest neighbors
+        u=rng.randint(N)
+        d=np.linalg.norm(pos-pos[u],axis=1)
+        d[u]=np.inf
+        v=np.argsort(d)[rng.randint(5)]
+        graph.add_edge(u,v,edist=d[v],weight=1.0,capa=1.0)
+    return graph,pos
+
+def timeit(func,*args):
+    """Measure run time of function.
+
+    Parameters
+    ----------
+    func : function
+    args : function arguments
+
+    Returns
+    -------
+    dt : run time in seconds
+
+    """
+    t0=time.time()
+    func(*args)
+    dt=time.time()-t0
+    return dt
+
+#%%############################################################################# benchmark node detection
+
+def benchmark_node_detect(sizes=[64,128,256,512]):
+
+    ones=np.ones((3,3,3))
+    for s in sizes:                                                             # for skeletons of increasing size...
+        imA=synthetic_skeleton(s,s,3,s//4)
+        tf=timeit(sp.ndimage.generic_filter,imA,utils.node_find,None,ones,None,'constant',0)
+        td=timeit(utils.node_detect,imA)
+        print('node detection',s,s,3,'generic_filter %.3fs'%tf,'node_detect %.3fs'%td)
+
+    return None
+
+#%%############################################################################# benchmark graph construction memory
+
+def benchmark_graph_memory(ly=2048,lx=2048,lz=30):
+
+    imA=synthetic_skeleton(ly,lx,lz,ly//2,thin=0)
+    imG=np.random.rand(ly,lx,lz)
+    tracemalloc.start()
+    t0=time.time()
+    skel=utils.node_graph(utils.skeleton_sparse(imA),imG)                       # construct graph on sparse skeleton
+    graph,pos=utils.make_graph(skel,imG)
+    dt=time.time()-t0
+    cur,peak=tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('graph construction',ly,lx,lz,'skeleton %.2f%%'%(100.0*imA.mean()),'peak memory %.0fMB'%(peak/1e6),'time %.1fs'%dt)
+    print('dense work arrays of previous make_graph %.0fMB'%(4*imG.size*8/1e6))
+
+    return None
+
+#%%############################################################################# benchmark graph randomization
+
+def benchmark_randomize(sizes=[250,500,1000,2000,4000]):
+
+    for E in sizes:                                                             # for graphs of increasing size at constant density...
+        L=int(10*np.sqrt(E))
+        graph,pos=synthetic_graph(E,E,L)
+        mask=np.ones((L,L))
+        rng=np.random.RandomState(0)
+        tr=timeit(utils.randomize_graph,graph,pos,mask,1,1,1000,rng)
+        print('planar randomization',E,'edges','%.2fs'%tr,'%.2fms per edge'%(1e3*tr/E))
+
+    return None
+
+#%%############################################################################# run benchmarks
+
+if __name__=='__main__':
+
+    benchmark_node_detect()
+    benchmark_graph_memory()
+    benchmark_randomize()
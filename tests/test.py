@@ -48,6 +48,797 @@ def test_read_tiff():
     
     return None
  
+#%%############################################################################# test node detection
+     
+def test_node_detect():
+    
+    import numpy as np
+    import scipy as sp
+    import scipy.ndimage
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    np.random.seed(0)
+    for shape,density in [((20,20,1),0.3),((15,15,4),0.15),((10,10,10),0.5)]:   # compare with pixel-wise node detection on random images
+        imA=np.random.rand(*shape)<density
+        imM=sp.ndimage.generic_filter(imA,utils.node_find,footprint=np.ones((3,3,3)),mode='constant',cval=0)
+        assert (utils.node_detect(imA)==imM).all()
+    
+    return None
+ 
+#%%############################################################################# test stack filters
+
+def test_tube_filter_stack():
+
+    import numpy as np
+    import skimage
+    import skimage.feature
+    import skimage.filters
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    sigma,block=2.0,11
+    for shape in [(40,50,3),(40,50,2,3)]:                                       # stacks (y,x,z) and (y,x,z,t)
+        imO=rng.rand(*shape)*200.0
+        imR=np.zeros(shape)
+        imM=np.zeros(shape,dtype='bool')
+        for k in np.ndindex(*shape[2:]):                                        # filter and threshold slice by slice as reference
+            idx=(slice(None),slice(None))+k
+            try:
+                imH=skimage.feature.hessian_matrix(imO[idx],sigma=sigma,mode='reflect',order='rc',use_gaussian_derivatives=False)
+            except TypeError:
+                imH=skimage.feature.hessian_matrix(imO[idx],sigma=sigma,mode='reflect',order='rc')
+            imE=-1.0*skimage.feature.hessian_matrix_eigvals(imH)[1]
+            imR[idx]=255.0*(imE-imE.min())/(imE.max()-imE.min())
+            imM[idx]=imR[idx]>skimage.filters.threshold_local(imR[idx],block,method='gaussian',mode='reflect')
+        assert (utils.tube_filter_stack(imO,sigma)==imR).all()                  # float64 is bit for bit identical
+        out=np.zeros(shape,dtype='float32')
+        imF=utils.tube_filter_stack(imO,sigma,out=out,dtype='float32')
+        assert imF is out and np.abs(imF-imR).max()<4e-4
+        assert (utils.threshold_stack(imR,block)==imM).all()
+    
+    return None
+
+#%%############################################################################# test component filters
+     
+def test_remove_dark_objects():
+    
+    import numpy as np
+    import scipy as sp
+    import scipy.ndimage
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    np.random.seed(0)
+    ones=np.ones((3,3,3))
+    imC=np.random.rand(40,40,3)<0.2
+    imO=np.random.rand(40,40,3)
+    imL,N=sp.ndimage.label(imC,structure=ones)                                  # remove components one by one
+    mean=imO[imC].mean()
+    imA=1.0*imC.copy()
+    for n in range(1,N+1):
+        if(np.mean(imO[imL==n])<mean*0.9):
+            imA[imL==n]=0
+    assert (utils.remove_dark_objects(imC,imO,0.9,ones)==imA).all()
+    
+    return None
+    
+def test_node_graph():
+    
+    import numpy as np
+    import scipy as sp
+    import scipy.ndimage
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    np.random.seed(0)
+    ones=np.ones((3,3,3))
+    for shape,density in [((30,30,1),0.15),((20,20,3),0.08),((15,15,5),0.05)]:
+        imA=np.random.rand(*shape)<density
+        imG=np.random.rand(*shape)+0.1
+        imM=sp.ndimage.generic_filter(imA,utils.node_find,footprint=ones,mode='constant',cval=0) # detect, condense, and filter nodes one by one
+        imL,N=sp.ndimage.label(imM,structure=ones)
+        sizes=sp.ndimage.sum(imL>0,imL,range(1,N+1))
+        coms=sp.ndimage.center_of_mass(imG,imL,range(1,N+1))
+        for n in range(N):
+            if(sizes[n]>1):
+                idx=(imL==n+1)
+                imL[idx]=0
+                imL[tuple(np.add(coms[n],0.5).astype('int'))]=n+1
+        imL,N=sp.ndimage.label(imL>0,structure=ones)
+        imB,B=sp.ndimage.label(imA,structure=ones)
+        imR=imA.copy()
+        for b in range(1,B+1):
+            if(np.max((imB==b)*(imL>0))==0):
+                imR[imB==b]=0
+        imE=1*((imR+imL)>0)+imL
+        assert (utils.node_graph(imA,imG)==imE).all()
+        assert (utils.node_condense(imM,imG,ones)==imL).all()                   # same condensed and labeled nodes as reference
+    imM=np.zeros((7,7,1),dtype='bool')                                          # cluster of three node pixels and single node pixel
+    imM[[1,1,2,5],[1,2,1,5],0]=True
+    imG=np.ones((7,7,1))
+    imG[2,1,0]=2.0
+    imL=utils.node_condense(imM,imG,ones)
+    assert list(zip(*np.nonzero(imL)))==[(2,1,0),(5,5,0)]                       # cluster moves to rounded center of mass (1.5,1.25)
+    assert imL[2,1,0]==1 and imL[5,5,0]==2 and imL.dtype.kind=='i'
+
+    return None
+
+def test_make_graph():
+    
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    np.random.seed(0)
+    sq2=np.sqrt(2.0)
+    sq3=np.sqrt(3.0)
+    diag=np.array([[[sq3,sq2,sq3],[sq2,1,sq2],[sq3,sq2,sq3]],[[sq2,1,sq2],[1,0,1],[sq2,1,sq2]],[[sq3,sq2,sq3],[sq2,1,sq2],[sq3,sq2,sq3]]])
+    for shape,density in [((40,40,1),0.2),((30,30,1),0.35),((20,20,3),0.1),((15,15,5),0.06)]:
+        imA=np.random.rand(*shape)<density
+        imG=np.random.rand(*shape)+0.1
+        imE=utils.node_graph(imA,imG)
+        N=imE.max()-1                                                           # trace filaments pixel by pixel as reference
+        pos=np.array(np.where(imE>1)).T[:,::-1].astype('int')[:,[1,2,0]]
+        imY=imE.copy()
+        imL=1.0*(imE>0)
+        imS=1.0*(imE>0)
+        ly,lx,lz=imE.shape
+        ys=(imY==1).sum()
+        while(ys>0):
+            for y,x,z in np.transpose(np.where(imY>1)):
+                xmin,xmax=utils.bounds(x-1,0,lx),utils.bounds(x+2,0,lx)
+                ymin,ymax=utils.bounds(y-1,0,ly),utils.bounds(y+2,0,ly)
+                zmin,zmax=utils.bounds(z-1,0,lz),utils.bounds(z+2,0,lz)
+                sec=imY[ymin:ymax,xmin:xmax,zmin:zmax]
+                lgt=imL[ymin:ymax,xmin:xmax,zmin:zmax]
+                stg=imS[ymin:ymax,xmin:xmax,zmin:zmax]
+                imY[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(sec==1,imY[y,x,z],sec)
+                imL[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(lgt==1,diag[0:ymax-ymin,0:xmax-xmin,0:zmax-zmin]+imL[y,x,z],lgt)
+                imS[ymin:ymax,xmin:xmax,zmin:zmax]=np.where(stg==1,imG[y,x,z]+imS[y,x,z],stg)
+            if((imY==1).sum()==ys):                                             # stop if remaining filament cannot be reached from any node
+                break
+            ys=(imY==1).sum()
+        graphR=nx.empty_graph(N,nx.MultiGraph())
+        for y,x,z in zip(*np.where(imY>1)):
+            xy=imY[y,x,z]
+            xmin,xmax=utils.bounds(x-1,0,lx),utils.bounds(x+2,0,lx)
+            ymin,ymax=utils.bounds(y-1,0,ly),utils.bounds(y+2,0,ly)
+            zmin,zmax=utils.bounds(z-1,0,lz),utils.bounds(z+2,0,lz)
+            sec=imY[ymin:ymax,xmin:xmax,zmin:zmax].flatten()
+            lgt=imL[ymin:ymax,xmin:xmax,zmin:zmax].flatten()
+            stg=imS[ymin:ymax,xmin:xmax,zmin:zmax].flatten()
+            for idx,i in enumerate(sec):
+                if(i!=xy and i>1):
+                    u,v=np.sort([xy-2,i-2])
+                    fdist=imL[y,x,z]+lgt[idx]
+                    weight=max(1e-9,imS[y,x,z]+stg[idx])
+                    graphR.add_edge(u,v,edist=np.linalg.norm(pos[u]-pos[v]),fdist=fdist,weight=weight,capa=1.0*weight/fdist,lgth=1.0*fdist/weight,conn=0,jump=0)
+        graph,poz=utils.make_graph(imE,imG)
+        eR=list(graphR.edges(keys=True,data=True))
+        eG=list(graph.edges(keys=True,data=True))
+        assert graphR.number_of_edges()>0
+        assert (poz==pos).all() and graph.number_of_nodes()==N
+        assert [e[:3] for e in eG]==[e[:3] for e in eR]                         # same edges in the same order
+        for key in ['edist','fdist','weight','capa','lgth','conn','jump']:
+            assert np.allclose([d[key] for u,v,k,d in eG],[d[key] for u,v,k,d in eR],rtol=1e-12,atol=0)
+
+    return None
+
+#%%############################################################################# test graph randomization
+
+def test_randomize_graph():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    N,E=80,120
+    pos=np.vstack([rng.randint(0,100,(2,N)),np.zeros(N)]).T.astype('int')
+    graph=nx.MultiGraph()
+    graph.add_nodes_from(range(N))
+    for e in range(E):
+        u,v=rng.choice(N,2,replace=False)
+        edist=np.linalg.norm(pos[u]-pos[v])
+        graph.add_edge(u,v,edist=edist,weight=1.0,capa=1.0)
+    mask=np.ones((100,100))
+    bins=[0,10,20,30,40,50,60,70,80,90,100,110,120,130,140,150,160,170,180,190,200,9999]
+    graphz,poz=utils.randomize_graph(graph,pos,mask,planar=1,weights=1,rng=np.random.RandomState(1))
+    pairs=[(min(u,v),max(u,v)) for u,v in graphz.edges()]
+    assert graphz.number_of_edges()==E and len(set(pairs))==E                  # each pair of new nodes is used at most once
+    de=[d['edist'] for u,v,d in graph.edges(data=True)]
+    dz=[d['edist'] for u,v,d in graphz.edges(data=True)]
+    assert all(np.isclose(d['edist'],np.linalg.norm(poz[u]-poz[v])) for u,v,d in graphz.edges(data=True))
+    assert (np.sort(np.digitize(de,bins))==np.sort(np.digitize(dz,bins))).all() # edge length distribution is preserved bin by bin
+
+    return None
+
+#%%############################################################################# test edge crossings
+
+def test_crossing_number():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    seg=np.array([[0,0],[2,2]])
+    segs=np.array([[[0,2],[2,0]],[[1,1],[3,1]],[[3,0],[3,3]],[[0,1],[4,5]]])
+    assert (utils.multi_line_intersect(seg,segs)==[True,False,False,False]).all() # crossing, touching, disjoint, and parallel segments
+    def orient(p,q,r):
+        return np.sign((q[0]-p[0])*(r[1]-p[1])-(q[1]-p[1])*(r[0]-p[0]))
+    rng=np.random.RandomState(0)
+    for N,E in [(10,15),(40,60),(80,150)]:
+        pos=rng.randint(0,30,(N,2))
+        graph=nx.MultiGraph()
+        graph.add_nodes_from(range(N))
+        for e in range(E):
+            graph.add_edge(*rng.randint(0,N,2))
+        edges=list(graph.edges())
+        cns=[]
+        for a,b in edges:                                                       # count crossings by brute force
+            cn=0
+            for c,d in edges:
+                if(len({a,b,c,d})==4 and orient(pos[a],pos[b],pos[c])*orient(pos[a],pos[b],pos[d])<0 and orient(pos[c],pos[d],pos[a])*orient(pos[c],pos[d],pos[b])<0):
+                    cn+=1
+            cns.append(cn)
+        assert utils.crossing_number(graph,pos)==cns
+
+    return None
+
+#%%############################################################################# test path lengths
+
+def test_path_lengths():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    N=60
+    graph=nx.MultiGraph()
+    graph.add_nodes_from(rng.permutation(N))
+    for e in range(90):
+        u,v=rng.randint(0,N,2)
+        graph.add_edge(u,v,lgth=0.1+rng.rand())
+    nodes=list(graph.nodes())
+    dists=dict(nx.all_pairs_dijkstra_path_length(graph,weight='lgth'))
+    dist=np.nan*np.ones((N,N))
+    for i,u in enumerate(nodes):                                                # reference path lengths in node order
+        for j,v in enumerate(nodes[:i]):
+            dist[i,j]=dists[u].get(v,np.nan)
+    assert np.allclose(utils.path_lengths(graph,chunk=7),dist,equal_nan=True)
+    distMU,distSD=utils.path_stats(graph,chunk=7)
+    assert np.isclose(distMU,np.nanmean(dist)) and np.isclose(distSD,np.nanstd(dist))
+    for strata in [0,1]:                                                        # sampling all source nodes gives exact statistics
+        mu,cv,ciMU,ciCV,K=utils.path_sample(graph,tol=0.0,batch=8,strata=strata,rng=np.random.RandomState(0))
+        assert K==N and np.isclose(mu,distMU) and np.isclose(cv,distSD/distMU) and np.isclose(ciMU,mu).all()
+    N=1500                                                                      # sampling stops early on larger graphs
+    graph=nx.connected_watts_strogatz_graph(N,4,0.1,seed=0)
+    for u,v,d in graph.edges(data=True):
+        d['lgth']=0.1+rng.rand()
+        d['capa']=1.0/d['lgth']
+    distMU,distSD=utils.path_stats(graph)
+    for strata in [0,1]:
+        mu,cv,ciMU,ciCV,K=utils.path_sample(graph,tol=0.05,strata=strata,rng=np.random.RandomState(0))
+        assert K<N and ciMU[0]<=distMU<=ciMU[1] and ciCV[0]<=distSD/distMU<=ciCV[1]
+    pos=np.vstack([2*(np.arange(N)%40),2*(np.arange(N)//40),np.zeros(N)]).T.astype('int') # place ring of nodes row by row
+    mask=np.ones((100,100),dtype='bool')
+    quanta=utils.compute_graph(graph,pos,mask,paths=1,rng=np.random.RandomState(0)) # confidence intervals and sample size are reported with sampled statistics
+    assert len(quanta)==15 and quanta[14]<N
+    assert quanta[10]<=quanta[5]<=quanta[11] and quanta[12]<=quanta[6]<=quanta[13]
+    assert len(utils.compute_graph(graph,pos,mask,paths=0))==10
+
+    return None
+
+#%%############################################################################# test algebraic connectivity
+
+def test_algebraic_connectivity():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    for N in [20,200]:                                                          # compare dense and sparse eigensolver with networkx
+        graph=nx.MultiGraph(nx.connected_watts_strogatz_graph(N,4,0.1,seed=0))
+        graph.add_edges_from(rng.randint(0,N,(5,2)))
+        for u,v,d in graph.edges(data=True):
+            d['capa']=rng.rand()
+        ac=np.sort(nx.laplacian_spectrum(graph,weight='capa'))[1]
+        assert np.isclose(utils.algebraic_connectivity(graph),ac)
+
+    return None
+
+#%%############################################################################# test flow betweenness
+
+def test_flow_betweenness():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    graph=nx.connected_watts_strogatz_graph(80,4,0.2,seed=0)
+    for u,v,d in graph.edges(data=True):
+        d['capa']=0.01+rng.rand()
+    efn=nx.edge_current_flow_betweenness_centrality(graph,weight='capa')
+    efn=dict([((u,v),b) for (u,v),b in efn.items()]+[((v,u),b) for (u,v),b in efn.items()])
+    efn=np.array([efn[e] for e in graph.edges()])
+    efb,err=utils.flow_betweenness(graph,block=16)                             # exact betweenness in blocks of edges
+    assert err==0 and np.allclose(efb,efn)
+    efb,err=utils.flow_betweenness(graph,samples=40,rng=rng)                   # approximate betweenness within error bound
+    assert (np.abs(efb-efn)<=err).all()
+    try:
+        utils.flow_betweenness(graph,samples=1)                                 # a single source node has no pairs of flows
+        assert False
+    except ValueError:
+        pass
+    graphz=utils.centralize_graph(graph,samples=40)                             # error bound is kept with centralities
+    assert graphz.graph['efb_err']>0 and utils.centralize_graph(graph).graph['efb_err']==0
+
+    return None
+
+#%%############################################################################# test edge centralities
+
+def test_edge_centralities():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    graph=nx.connected_watts_strogatz_graph(60,4,0.3,seed=0)
+    for u,v,d in graph.edges(data=True):
+        d['capa']=0.01+rng.rand()
+    lineg=nx.line_graph(graph)                                                  # compute centralities on explicit line graph
+    degree=graph.degree(weight='capa')
+    for u,v,d in lineg.edges(data=True):
+        d['capa']=degree[list(set(u).intersection(v))[0]]
+    cens=[dict(lineg.degree(weight='capa')),nx.eigenvector_centrality_numpy(lineg,weight='capa'),nx.pagerank(lineg,weight='capa')]
+    for cen,ref in zip(utils.edge_centralities(graph,weight='capa'),cens):
+        assert np.allclose(cen,[ref[e] if e in ref else ref[e[::-1]] for e in graph.edges()])
+    for u,v,d in graph.edges(data=True):
+        d['lgth']=1.0/d['capa']
+    table=utils.edge_table(graph,['capa','lgth'])                               # reuse edge table of graph for all centralities
+    for cen,ref in zip(utils.edge_centralities(graph,table=table),utils.edge_centralities(graph)):
+        assert np.allclose(cen,ref)
+    graphz=utils.centralize_graph(graph,table=table)
+    assert (table['capa']==utils.edge_table(graph,['capa'])['capa']).all()      # table of original graph is left unchanged
+    for k in ['capa','lgth','epb','efb','ndg','npr']:
+        assert np.allclose(utils.edge_table(graphz,[k])[k],utils.edge_table(utils.centralize_graph(graph),[k])[k])
+
+    return None
+
+#%%############################################################################# test edge tables
+
+def test_edge_table():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    graph=nx.empty_graph(20,nx.MultiGraph())
+    for e in range(40):
+        u,v=rng.randint(0,20,2)
+        graph.add_edge(u,v,capa=rng.rand(),lgth=rng.rand())
+    table=utils.edge_table(graph)
+    assert table.dtype.names==('src','dst','capa','lgth') and table['src'].dtype=='int32'
+    graphz=utils.table_graph(table,20,multi=1)                                  # convert back and forth
+    assert list(graphz.edges(data=True))==list(graph.edges(data=True))
+    utils.edge_write(graphz,{'capa':2*table['capa']})
+    assert np.allclose(utils.edge_table(graphz,['capa'])['capa'],2*table['capa'])
+
+    return None
+
+#%%############################################################################# test multigraph projection
+
+def test_unify_graph():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    graph=nx.empty_graph(20,nx.MultiGraph())
+    for e in range(60):
+        u,v=rng.randint(0,20,2)
+        graph.add_edge(u,v,edist=1.0,fdist=1.0,weight=1.0,capa=rng.rand(),lgth=rng.rand(),conn=0,jump=0)
+    graphz=utils.unify_graph(graph)
+    assert graphz.number_of_edges()==len(set(map(frozenset,graph.edges())))
+    for u,v,d in graphz.edges(data=True):                                       # compare with parallel edges
+        para=list(graph[u][v].values())
+        assert d['multi']==len(para)
+        assert np.isclose(d['capa'],sum(p['capa'] for p in para))
+        assert d['lgth']==min(p['lgth'] for p in para)
+    graphz=utils.unify_graph(nx.empty_graph(5,nx.MultiGraph()))                # graph without edges
+    assert graphz.number_of_nodes()==5 and graphz.number_of_edges()==0
+    tablez=utils.unify_table(utils.edge_table(graph,['capa','lgth'])[:0])
+    assert len(tablez)==0 and 'multi' in tablez.dtype.names
+
+    return None
+
+#%%############################################################################# test graph connection
+
+def test_connect_graph():
+
+    import networkx as nx
+    import numpy as np
+    import scipy as sp
+    import scipy.spatial
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    N=120
+    pos=np.vstack([30*rng.rand(2,N),2*rng.rand(N)]).T
+    graph=nx.empty_graph(N)
+    for e in range(80):
+        u,v=rng.randint(0,N,2)
+        graph.add_edge(u,v,capa=1.0)
+    imG=rng.rand(30,30,3)
+    dists=sp.spatial.distance_matrix(pos,pos)
+    gc=graph.copy()
+    comp=sorted(nx.connected_components(gc),key=len)[::-1]
+    bridges=[]
+    while len(comp)>1:                                                          # connect nearest node to largest component one by one
+        compl=sorted(comp[0])
+        compi=sorted(set(range(N)).difference(comp[0]))
+        n0,ni=np.unravel_index(dists[compl][:,compi].argmin(),(len(compl),len(compi)))
+        gc.add_edge(compl[n0],compi[ni])
+        bridges.append((compi[ni],compl[n0]))
+        comp=sorted(nx.connected_components(gc),key=len)[::-1]
+    graphz=utils.connect_graph(graph,pos,imG)
+    added=[(u,v) for u,v,d in graphz.edges(data=True) if d.get('conn')==1]
+    assert set(map(frozenset,added))==set(map(frozenset,bridges))
+    assert nx.is_connected(graphz)
+
+    return None
+
+#%%############################################################################# test jump network
+
+def test_jump_paths():
+
+    import itertools
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    M=12
+    jnet=nx.cycle_graph(M)
+    for u,v in jnet.edges():
+        jnet[u][v].update(weight=1.0+rng.rand(),jump=0.0)
+    for u,v,j in [(0,6,1.0),(2,9,1.0),(3,8,0.001),(4,11,0.001)]:                 # add vertical and horizontal jump edges
+        jnet.add_edge(u,v,weight=0.0,jump=j)
+    SL,JV,JH,SP=utils.jump_paths(jnet)
+    for s,t in itertools.product(range(M),repeat=2):                            # compare with all simple paths with at most one jump per direction
+        best=np.inf
+        for path in nx.all_simple_paths(jnet,s,t) if s!=t else [[s]]:
+            jumps=[jnet[u][v]['jump'] for u,v in zip(path[:-1],path[1:])]
+            if(jumps.count(1.0)<=1 and jumps.count(0.001)<=1):
+                best=min(best,sum(jnet[u][v]['weight'] for u,v in zip(path[:-1],path[1:])))
+        assert np.isclose(SL[s,t],best)
+        path=utils.jump_path(SP,JV,JH,s,t)
+        assert path[0]==s and path[-1]==t
+        assert np.isclose(sum(jnet[u][v]['weight'] for u,v in zip(path[:-1],path[1:])),SL[s,t])
+        jumps=[jnet[u][v]['jump'] for u,v in zip(path[:-1],path[1:])]
+        assert jumps.count(1.0)==JV[s,t] and jumps.count(0.001)==JH[s,t]
+    SLc,JVc,JHc,SPc=utils.jump_paths(jnet,indices=[3,7],limit=2.5)             # compare with paths limited in length
+    near=SL[[3,7]]<2.5
+    assert np.array_equal(SLc[near],SL[[3,7]][near]) and np.isinf(SLc[~near]).all()
+    assert np.array_equal(JVc[near],JV[[3,7]][near]) and np.array_equal(JHc[near],JH[[3,7]][near])
+
+    return None
+
+def test_boundary_graph():
+
+    import networkx as nx
+    import numpy as np
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    mask=np.zeros((60,90),dtype='bool')                                         # wide cell so that swapped image axes fail
+    mask[10:50,10:80]=True
+    imG=rng.rand(60,90,1)+0.1
+    N=40
+    ys,xs=np.where(mask)
+    idx=rng.choice(len(ys),N,replace=False)
+    pos=np.vstack([xs[idx],ys[idx],np.zeros(N)]).T.astype('int')
+    graph=nx.empty_graph(N,nx.MultiGraph())
+    polya,polyn=utils.mask2poly(mask)
+    jborder=utils.pbc_jnet_border(polyn)
+    jnet,SP,SL,JV,JH=utils.pbc_jnet_interior(pos,polya,jborder,cthres=10.0)     # all paths from all nodes
+    graphA=utils.boundary_graph(jnet,graph,pos,SP,SL,JV,JH,imG,dthres=10.0)
+    jnet,SP,SL,JV,JH,src=utils.pbc_jnet_interior(pos,polya,jborder,cthres=10.0,dthres=10.0,src=1) # short paths from nodes close to the border
+    graphB=utils.boundary_graph(jnet,graph,pos,SP,SL,JV,JH,imG,dthres=10.0,src=src)
+    assert len(src)<N and len(SL)==len(src)
+    edgesA=sorted((min(u,v),max(u,v),d['edist'],d['weight']) for u,v,d in graphA.edges(data=True))
+    edgesB=sorted((min(u,v),max(u,v),d['edist'],d['weight']) for u,v,d in graphB.edges(data=True))
+    assert len(edgesA)>0 and np.allclose(edgesA,edgesB)
+    try:
+        utils.pbc_jnet_interior(pos,polya,jborder,dthres=10.0)                  # rows of limited paths need their source nodes
+        assert False
+    except ValueError:
+        pass
+
+    return None
+
+#%%############################################################################# test track reader
+
+def test_xmlread():
+
+    import numpy as np
+    import os
+    import sys
+    import tempfile
+    sys.path.append('../CytoSeg')
+    import utils
+    spot='<Spot ID="%d" POSITION_T="%d.0" POSITION_X="%d.5" POSITION_Y="2.0" POSITION_Z="3.0" MEAN_INTENSITY="1.0" TOTAL_INTENSITY="9.0" QUALITY="0.5" ESTIMATED_DIAMETER="4.0" />'
+    edge='<Edge SPOT_SOURCE_ID="%d" SPOT_TARGET_ID="%d" VELOCITY="1.0" />'
+    text='<TrackMate><Model><AllSpots>'
+    for f in range(3):
+        text+='<SpotsInFrame frame="%d">'%f+spot%(10+f,f,f)+spot%(20+f,f,5+f)+'</SpotsInFrame>'
+    text+='</AllSpots><AllTracks>'
+    text+='<Track TRACK_ID="4">'+edge%(11,12)+edge%(10,11)+'</Track>'             # edges are not sorted by time
+    text+='<Track TRACK_ID="7">'+edge%(20,21)+'</Track>'
+    text+='<Track TRACK_ID="9"></Track>'
+    text+='</AllTracks><FilteredTracks><TrackID TRACK_ID="4" /></FilteredTracks></Model></TrackMate>'
+    fd,name=tempfile.mkstemp(suffix='.xml')
+    with os.fdopen(fd,'w') as f:
+        f.write(text)
+    T=utils.xmlread(name,cache=0)
+    tab=utils.xmlread(name,threed=1,table=1,cache=0)
+    assert [E.shape for E in T]==[(2,16),(1,16),(0,)]
+    assert np.array_equal(T[0][:,0],[0,1]) and np.array_equal(T[0][:,8],[1,2])
+    assert np.array_equal(T[0][:,1],[0.5,1.5]) and np.array_equal(T[1][0,[1,9]],[5.5,6.5])
+    assert (T[0][:,3]==0).all()                                                 # z is ignored for two-dimensional data
+    assert list(tab['track'])==[4,4,7] and (tab['z0']==3).all()
+    assert np.array_equal(tab['x1'],[1.5,2.5,6.5])
+    for threed in [0,1]:                                                        # parse xml file and load tracks from cache
+        T0=utils.xmlread(name,threed=threed)
+        T1=utils.xmlread(name,threed=threed)
+        assert os.path.isfile(name+'.npz')
+        assert all(np.array_equal(E0,E1) and E0.shape==E1.shape for E0,E1 in zip(T0,T1)) and len(T0)==len(T1)==3
+    with open(name,'w') as f:                                                   # rebuild cache when xml file changes
+        f.write(text.replace('POSITION_X="1.5"','POSITION_X="8.5"'))
+    assert np.array_equal(utils.xmlread(name,table=1)['x0'],[0.5,8.5,5.5])
+    stat=os.stat(name)                                                          # update cache key if only modification time changes
+    os.utime(name,(stat.st_atime,stat.st_mtime+100.0))
+    assert np.array_equal(utils.xmlread(name,table=1)['x0'],[0.5,8.5,5.5])
+    with np.load(name+'.npz') as data:
+        assert data['key'][1]==os.stat(name).st_mtime
+    temps=[f for f in os.listdir(os.path.dirname(name)) if f.endswith('.tmp')]
+    for size in [0.5,0.0]:                                                      # reparse xml file if cache is truncated or empty
+        with open(name+'.npz','rb') as f:
+            data=f.read()
+        with open(name+'.npz','wb') as f:
+            f.write(data[:int(size*len(data))])
+        assert np.array_equal(utils.xmlread(name,table=1)['x0'],[0.5,8.5,5.5])
+        assert utils.track_load(name,0)[0] is not None                          # cache is rewritten
+    assert [f for f in os.listdir(os.path.dirname(name)) if f.endswith('.tmp')]==temps # no temporary files are left
+    os.remove(name)
+    os.remove(name+'.npz')
+
+    return None
+
+#%%############################################################################# test lazy image series
+
+def test_series_read():
+
+    import numpy as np
+    import os
+    import shutil
+    import sys
+    import tempfile
+    sys.path.append('../CytoSeg')
+    import utils
+    temp=tempfile.mkdtemp()
+    try:
+        imO=np.random.RandomState(0).randint(0,255,(4,20,30,3)).astype('uint8')
+        for compression in [None,'zlib']:                                       # memory-map uncompressed and read compressed files page by page
+            name=os.path.join(temp,'series_%s.tif'%compression)
+            utils.tifffile.imwrite(name,imO,compression=compression)
+            imS=utils.series_read(name)
+            assert isinstance(imS,np.memmap if compression is None else utils.TiffSeries)
+            assert imS.shape==imO.shape and len(imS)==4
+            assert np.array_equal(imS[2],imO[2]) and np.array_equal(imS[-1],imO[-1])
+            spec,tmp=utils.series_share(imS)                                    # reopen series as in worker processes
+            assert tmp is None
+            assert np.array_equal(utils.series_open(spec)[1],imO[1])
+            frames=list(utils.series_frames(imS,[0,3]))
+            assert np.array_equal(frames[1],imO[3])
+            del imS
+    finally:
+        shutil.rmtree(temp,ignore_errors=True)
+
+    return None
+
+#%%############################################################################# test series extraction
+
+def test_extract_series():
+
+    import numpy as np
+    import os
+    import shutil
+    import skimage
+    import skimage.draw
+    import sys
+    import tempfile
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    I,L=3,64
+    imO=np.zeros((I,L,L))                                                       # synthetic series of random filaments
+    for i in range(I):
+        for l in range(12):
+            rr,cc=skimage.draw.line(*rng.randint(2,L-2,4))
+            imO[i,rr,cc]+=100.0
+        imO[i]+=10.0*rng.rand(L,L)
+    mask=np.ones((L,L),dtype='bool')
+    temp=tempfile.mkdtemp()
+    tempdir=tempfile.tempdir
+    try:
+        name=os.path.join(temp,'series.tif')
+        utils.tifffile.imwrite(name,imO.astype('float32'),compression='zlib')
+        imS=utils.series_read(name)
+        tempfile.tempdir=os.path.join(temp,'shared')                            # collect temporary memory-mapped files
+        os.mkdir(tempfile.tempdir)
+        results=[utils.extract_series(imO,mask,1.0,11,10,0.5,randn=2,seed=1,processes=processes) for processes in [1,2]]
+        results+=[utils.extract_series(imO.astype('float32'),mask,1.0,11,10,0.5,randn=2,seed=1,frames=[2,0],processes=processes) for processes in [1,2]]
+        results+=[utils.extract_series(imS,mask,1.0,11,10,0.5,randn=2,seed=1,frames=[2,0],processes=2)] # open TIFF file once per worker
+        assert os.listdir(tempfile.tempdir)==[]                                 # temporary files are removed
+        imS.close()
+        for (dataB,dataR),(dataC,dataS) in [(results[0],results[1]),(results[2],results[3]),(results[2],results[4])]:
+            assert len(dataB)==len(dataC) and len(dataR)==len(dataS)
+            for d,e in zip(dataB+dataR,dataC+dataS):                            # identical results for any number of processes
+                assert d[0]==e[0]
+                ed,ee=sorted(d[1].edges(data=True),key=lambda x:x[:2]),sorted(e[1].edges(data=True),key=lambda x:x[:2])
+                assert [x[:2] for x in ed]==[x[:2] for x in ee]
+                for key in ed[0][2]:                                            # eigenvector centralities may differ in the last digits
+                    assert np.allclose([x[2][key] for x in ed],[x[2][key] for x in ee],rtol=1e-9,atol=1e-12)
+                assert np.array_equal(d[2],e[2]) and np.allclose(d[3],e[3],rtol=1e-9,atol=1e-12)
+        assert [d[0] for d in results[1][0]]==[0,1,2] and [d[0] for d in results[1][1]]==[0,0,1,1,2,2] # frames in frame order
+        assert [d[0] for d in results[3][0]]==[2,0] and [d[0] for d in results[3][1]]==[2,2,0,0]
+    finally:
+        tempfile.tempdir=tempdir
+        shutil.rmtree(temp,ignore_errors=True)
+
+    return None
+
+def test_randomize_series():
+
+    import numpy as np
+    import skimage
+    import skimage.draw
+    import sys
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(1)
+    L=64
+    imI=np.zeros((L,L))                                                         # synthetic frame of random filaments
+    for l in range(12):
+        rr,cc=skimage.draw.line(*rng.randint(2,L-2,4))
+        imI[rr,cc]+=100.0
+    imI+=10.0*rng.rand(L,L)
+    mask=np.ones((L,L),dtype='bool')
+    rands=[utils.extract_frame(imI,mask,1.0,11,10,0.5,randn=4,randw=w,seed=3,frame=5,randp=randp)[3] for w in [0,1] for randp in [1,2]]
+    for randA,randB in [(rands[0],rands[1]),(rands[2],rands[3])]:               # identical replicates for any number of processes
+        assert len(randA)==len(randB)==4
+        for (gA,pA,qA),(gB,pB,qB) in zip(randA,randB):
+            eA,eB=sorted(gA.edges(data=True),key=lambda x:x[:2]),sorted(gB.edges(data=True),key=lambda x:x[:2])
+            assert [x[:2] for x in eA]==[x[:2] for x in eB]
+            for key in eA[0][2]:                                                # eigenvector centralities may differ in the last digits
+                assert np.allclose([x[2][key] for x in eA],[x[2][key] for x in eB],rtol=1e-9,atol=1e-12)
+            assert np.array_equal(pA,pB) and np.allclose(qA,qB,rtol=1e-9,atol=1e-12)
+    try:
+        utils.extract_series(imI[None],mask,1.0,11,10,0.5,randn=2,processes=2,randp=2) # workers cannot start further workers
+        assert False
+    except ValueError:
+        pass
+
+    return None
+
+#%%############################################################################# test stage cache
+
+def test_cache():
+
+    import numpy as np
+    import os
+    import shutil
+    import sys
+    import tempfile
+    sys.path.append('../CytoSeg')
+    import utils
+    temp=tempfile.mkdtemp()
+    try:
+        im=np.arange(12.0).reshape(3,4)
+        key=utils.cache_key('skeleton',im,2.0,101.0)
+        assert key==utils.cache_key('skeleton',im.copy(),2.0,101.0)         # keys depend on content and parameters only
+        assert key!=utils.cache_key('skeleton',im,2.5,101.0)
+        assert key!=utils.cache_key('skeleton',im.astype('float32'),2.0,101.0)
+        cache=utils.cache_open(os.path.join(temp,'cache'),size=10**6)
+        assert utils.cache_load(cache,key) is None and utils.cache_load(None,key) is None
+        utils.cache_save(cache,key,im=im,shape=im.shape)
+        data=utils.cache_load(cache,key)
+        assert np.array_equal(data['im'],im) and tuple(data['shape'])==(3,4)
+        utils.cache_clear(cache,key)                                            # invalidate single entry
+        assert utils.cache_load(cache,key) is None
+        big=np.random.RandomState(0).rand(40000)                                # entries of about 300kB each
+        keys=[utils.cache_key(i) for i in range(3)]
+        for i,k in enumerate(keys):
+            utils.cache_save(cache,k,big=big+i)
+            os.utime(os.path.join(cache[0],k+'.npz'),(i,i))                    # set times of use in order of saving
+        utils.cache_load(cache,keys[0])                                         # use oldest entry again
+        utils.cache_save(cache,utils.cache_key(3),big=big+3)                    # evict least recently used entry
+        assert utils.cache_load(cache,keys[0]) is not None
+        assert utils.cache_load(cache,keys[1]) is None and utils.cache_load(cache,keys[2]) is not None
+        utils.cache_clear(cache)
+        assert os.listdir(cache[0])==[]
+    finally:
+        shutil.rmtree(temp,ignore_errors=True)
+
+    return None
+
+#%%############################################################################# test graph store
+
+def test_graph_store():
+
+    import networkx as nx
+    import numpy as np
+    import os
+    import shutil
+    import sys
+    import tempfile
+    sys.path.append('../CytoSeg')
+    import utils
+    rng=np.random.RandomState(0)
+    dataB,dataR=[],[]
+    for i in range(3):                                                          # generate graphs of three frames with two randomized graphs each
+        for r in range(3):
+            graph=nx.empty_graph(15,nx.MultiGraph() if r==2 else nx.Graph())
+            for e in range(20):
+                u,v=rng.randint(0,15,2)
+                graph.add_edge(u,v,capa=rng.rand(),lgth=rng.rand())
+            pos=rng.randint(0,100,(15,3))
+            (dataB if r==0 else dataR).append([i,graph,pos,[]])
+    temp=tempfile.mkdtemp()
+    try:
+        name=os.path.join(temp,'graphs.npz')
+        keys=utils.store_write(name,dataB,dataR[:3])
+        assert utils.store_write(name,[],dataR[3:],mode='a')==[(1,2),(2,1),(2,2)] # add graphs continuing replicate numbers
+        try:
+            utils.store_write(name,dataB[1:2],mode='a')                         # stored biological networks are not duplicated
+            assert False
+        except ValueError:
+            pass
+        store=utils.GraphStore(name)
+        assert keys==[(0,0),(1,0),(2,0),(0,1),(0,2),(1,1)]
+        assert len(store)==9 and (2,2) in store and (3,0) not in store
+        for (i,r),(j,graph,pos,quant) in zip([(0,0),(1,0),(2,0),(0,1),(0,2),(1,1),(1,2),(2,1),(2,2)],dataB+dataR):
+            graphz,posz=store[(i,r)]
+            assert graphz.is_multigraph()==graph.is_multigraph()
+            assert list(graphz.edges(data=True))==list(graph.edges(data=True))
+            assert np.array_equal(posz,pos)
+        store.close()
+    finally:
+        shutil.rmtree(temp,ignore_errors=True)
+
+    return None
+
 #%%############################################################################# under construction
     
     